@@ -0,0 +1,229 @@
+"""Asset loading: a packed, memory-mapped bundle with per-file fallback.
+
+`python assets.py` packs every sprite in assets/images into one RGBA
+texture atlas and every sound in assets/sounds into a PCM bank already
+in the mixer's format, and writes both to a single versioned file.
+At runtime load_assets() maps that file and builds surfaces and sounds
+straight from the mapped bytes; anything the bundle lacks, or a bundle
+built for a different mixer format, falls back to load_image/load_sound.
+A bundle that is corrupt, or older than the files it was packed from,
+is ignored entirely.
+"""
+import pygame
+import json
+import mmap
+import os
+import struct
+
+IMAGE_DIR = os.path.join('assets', 'images')
+SOUND_DIR = os.path.join('assets', 'sounds')
+BUNDLE_PATH = os.path.join('assets', 'bundle.bin')
+
+BUNDLE_MAGIC = b'RBTNPAK\0'
+BUNDLE_VERSION = 2
+HEADER = struct.Struct('<8sII')  # magic, version, index length
+ALIGN = 16
+ATLAS_WIDTH = 256
+
+# Fallback colors when an image is missing
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+
+def load_image(name):
+    try:
+        path = os.path.join(IMAGE_DIR, name)
+        print(f"Loading image from: {os.path.abspath(path)}")
+        if not os.path.exists(path):
+            print(f"File does not exist: {path}")
+            raise FileNotFoundError
+        image = pygame.image.load(path)
+        if pygame.display.get_surface() is None:
+            # Nothing to convert for without a display surface (the texture backend)
+            return image
+        return image.convert_alpha()
+    except Exception as e:
+        print(f"Error loading image {name}: {str(e)}")
+        # Create a surface with the default color if image loading fails
+        surf = pygame.Surface((32, 32), pygame.SRCALPHA)
+        pygame.draw.rect(surf, RED if "player" in name else BLUE if "enemy" in name else GREEN, surf.get_rect())
+        return surf
+
+def load_sound(name):
+    try:
+        return pygame.mixer.Sound(os.path.join(SOUND_DIR, name))
+    except:
+        print(f"Couldn't load sound: {name}")
+        return None
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def source_stamps():
+    """{path: [mtime_ns, size]} of every file a bundle packs, to spot stale bundles."""
+    stamps = {}
+    for folder, ext in ((IMAGE_DIR, '.png'), (SOUND_DIR, '.wav')):
+        try:
+            names = sorted(os.listdir(folder))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(ext):
+                st = os.stat(os.path.join(folder, name))
+                stamps[f"{os.path.basename(folder)}/{name}"] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+def read_index(mapping):
+    """Index and data offset of a mapped bundle; raises ValueError if it is unusable."""
+    magic, version, index_length = HEADER.unpack_from(mapping)
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+        raise ValueError("unsupported format")
+    index = json.loads(bytes(mapping[HEADER.size:HEADER.size + index_length]))
+    data_start = _align(HEADER.size + index_length)
+    data_length = len(mapping) - data_start
+    atlas_info = index['atlas']
+    width, height = atlas_info['size']
+    sections = [(atlas_info['offset'], atlas_info['length'])] + list(index['sounds'].values())
+    if (atlas_info['length'] != width * height * 4 or
+            any(start < 0 or start + length > data_length for start, length in sections)):
+        raise ValueError("truncated")
+    return index, data_start
+
+def pack_atlas(images, width=ATLAS_WIDTH, padding=1):
+    """Shelf-pack named surfaces into one atlas. Returns (atlas, {name: rect})."""
+    order = sorted(images, key=lambda name: -images[name].get_height())
+    rects = {}
+    x = y = shelf = 0
+    for name in order:
+        w, h = images[name].get_size()
+        if x + w > width:
+            x = 0
+            y += shelf + padding
+            shelf = 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w + padding
+        shelf = max(shelf, h)
+    atlas = pygame.Surface((width, max(1, y + shelf)), pygame.SRCALPHA)
+    for name, rect in rects.items():
+        atlas.blit(images[name], rect)
+    return atlas, rects
+
+def build_bundle(path=BUNDLE_PATH):
+    """Pack assets/images and assets/sounds into one bundle file."""
+    images = {name: pygame.image.load(os.path.join(IMAGE_DIR, name))
+              for name in sorted(os.listdir(IMAGE_DIR)) if name.endswith('.png')}
+    atlas, rects = pack_atlas(images)
+    atlas_bytes = pygame.image.tobytes(atlas, 'RGBA')
+
+    # Sound() converts to the mixer's format on load; get_raw() is that PCM
+    sound_bytes = {name: pygame.mixer.Sound(os.path.join(SOUND_DIR, name)).get_raw()
+                   for name in sorted(os.listdir(SOUND_DIR)) if name.endswith('.wav')}
+
+    data = bytearray()
+    index = {
+        'sources': source_stamps(),
+        'mixer': list(pygame.mixer.get_init()),
+        'atlas': {'size': list(atlas.get_size()), 'offset': 0, 'length': len(atlas_bytes)},
+        'images': {name: list(rect) for name, rect in rects.items()},
+        'sounds': {},
+    }
+    data += atlas_bytes
+    for name, raw in sound_bytes.items():
+        data += bytes(_align(len(data)) - len(data))
+        index['sounds'][name] = [len(data), len(raw)]
+        data += raw
+
+    index_bytes = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    header = HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index_bytes))
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(index_bytes)
+        f.write(bytes(_align(len(header) + len(index_bytes)) - len(header) - len(index_bytes)))
+        f.write(data)
+    return index
+
+class Assets:
+    """Images and sounds by file name, served from the bundle when possible."""
+
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        self.atlas = None
+        self.atlas_rects = {}
+        self.from_bundle = False
+        self._mapping = None
+        self._data = None
+        self._bundle_sounds = {}
+        self._bundle_mixer = None
+
+    def image(self, name):
+        image = self.images.get(name)
+        if image is None:
+            image = self.images[name] = load_image(name)
+        return image
+
+    def sound(self, name):
+        # Sounds are built on first use, so the mixer can be started after the images load
+        if name not in self.sounds:
+            entry = self._bundle_sounds.get(name)
+            if entry is not None and list(pygame.mixer.get_init() or ()) == self._bundle_mixer:
+                start, length = entry
+                self.sounds[name] = pygame.mixer.Sound(buffer=self._data[start:start + length])
+            else:
+                self.sounds[name] = load_sound(name)
+        return self.sounds[name]
+
+    def load_bundle(self, path=BUNDLE_PATH):
+        """Map a bundle file and build surfaces/sounds from it; False if unusable."""
+        try:
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        except ValueError:
+            print(f"Ignoring asset bundle {path}: empty file")
+            return False
+        try:
+            index, data_start = read_index(mapping)
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            # JSON decode errors are ValueErrors; short headers are struct errors
+            print(f"Ignoring asset bundle {path}: {e}")
+            mapping.close()
+            return False
+        stamps = source_stamps()
+        if stamps and index.get('sources') != stamps:
+            print(f"Ignoring asset bundle {path}: assets changed since it was built "
+                  f"(rebuild it with python assets.py)")
+            mapping.close()
+            return False
+        data = memoryview(mapping)[data_start:]
+
+        atlas_info = index['atlas']
+        start = atlas_info['offset']
+        atlas = pygame.image.frombuffer(data[start:start + atlas_info['length']],
+                                        tuple(atlas_info['size']), 'RGBA')
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        self.atlas = atlas
+        for name, rect in index['images'].items():
+            self.atlas_rects[name] = pygame.Rect(rect)
+            self.images[name] = atlas.subsurface(rect)
+
+        # PCM is only usable if the mixer runs in the format it was packed for
+        self._bundle_sounds = index['sounds']
+        self._bundle_mixer = index['mixer']
+        self._data = data
+        self._mapping = mapping
+        self.from_bundle = True
+        return True
+
+def load_assets(path=BUNDLE_PATH):
+    assets = Assets()
+    assets.load_bundle(path)
+    return assets
+
+if __name__ == '__main__':
+    # Build the bundle with the same mixer settings the game uses
+    pygame.mixer.init()
+    index = build_bundle()
+    print(f"Packed {len(index['images'])} images and {len(index['sounds'])} sounds into {BUNDLE_PATH}")
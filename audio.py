@@ -0,0 +1,136 @@
+"""Voice management for sound effects.
+
+Each sound belongs to a category with its own pool of mixer channels,
+so a burst of explosions can't starve the shot or rescue sounds.
+Identical sounds requested in the same tick play once, repeats inside
+a category's minimum interval are dropped, and a full pool steals the
+oldest or quietest voice instead of dropping the new one.
+"""
+import pygame
+
+# category: (channels, min interval between repeats of one sound in ms, steal policy)
+CATEGORIES = {
+    'weapon': (4, 50, 'oldest'),
+    'explosion': (6, 30, 'quietest'),
+    'player': (2, 0, 'oldest'),
+    'ui': (2, 0, 'oldest'),
+}
+
+# Sound name to category
+SOUND_CATEGORIES = {
+    'shoot': 'weapon',
+    'explosion': 'explosion',
+    'death': 'player',
+    'rescue': 'player',
+    'wave_clear': 'ui',
+}
+
+DEFAULT_CATEGORY = 'ui'
+
+class Voice:
+    __slots__ = ('channel', 'name', 'started', 'volume')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.name = None
+        self.started = 0
+        self.volume = 0.0
+
+    @property
+    def busy(self):
+        return self.name is not None and self.channel.get_busy()
+
+class AudioManager:
+    """Plays named sounds through per-category channel pools.
+
+    play() only queues a request; flush(now_ms) plays everything queued
+    since the last flush, so call it once per simulation tick.
+    """
+
+    def __init__(self, sounds, categories=CATEGORIES, sound_categories=SOUND_CATEGORIES):
+        self.sounds = sounds
+        self.categories = categories
+        self.sound_categories = sound_categories
+        total = sum(channels for channels, _, _ in categories.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        # Keep the pools out of reach of plain Sound.play()
+        pygame.mixer.set_reserved(total)
+        self.pools = {}
+        index = 0
+        for category, (channels, _, _) in categories.items():
+            self.pools[category] = [Voice(pygame.mixer.Channel(i)) for i in range(index, index + channels)]
+            index += channels
+        self.pending = {}
+        self.last_played = {}
+        self.played = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.stolen = 0
+
+    def category(self, name):
+        return self.sound_categories.get(name, DEFAULT_CATEGORY)
+
+    def play(self, name, volume=1.0):
+        # Identical requests in one tick merge into the loudest of them
+        if name in self.pending:
+            self.coalesced += 1
+            self.pending[name] = max(self.pending[name], volume)
+        else:
+            self.pending[name] = volume
+
+    def flush(self, now):
+        pending, self.pending = self.pending, {}
+        for name, volume in pending.items():
+            sound = self.sounds.get(name)
+            if sound is None:
+                continue
+            category = self.category(name)
+            _, min_interval, steal = self.categories[category]
+            last = self.last_played.get(name)
+            if last is not None and now - last < min_interval:
+                self.rate_limited += 1
+                continue
+            voice = self.free_voice(category, steal)
+            voice.channel.set_volume(volume)
+            voice.channel.play(sound)
+            voice.name = name
+            voice.started = now
+            voice.volume = volume * sound.get_volume()
+            self.last_played[name] = now
+            self.played += 1
+
+    def free_voice(self, category, steal='oldest'):
+        pool = self.pools[category]
+        for voice in pool:
+            if not voice.busy:
+                return voice
+        self.stolen += 1
+        if steal == 'quietest':
+            # Ties go to the oldest voice
+            return min(pool, key=lambda v: (v.volume, v.started))
+        return min(pool, key=lambda v: v.started)
+
+    def active_voices(self):
+        return {category: sum(voice.busy for voice in pool) for category, pool in self.pools.items()}
+
+    def stats(self):
+        active = self.active_voices()
+        channels = sum(len(pool) for pool in self.pools.values())
+        total = sum(active.values())
+        return {
+            'active': active,
+            'active_total': total,
+            'channels': channels,
+            'load': total / channels if channels else 0.0,
+            'played': self.played,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'stolen': self.stolen,
+        }
+
+    def stop(self):
+        for pool in self.pools.values():
+            for voice in pool:
+                voice.channel.stop()
+                voice.name = None
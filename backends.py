@@ -0,0 +1,160 @@
+"""Display backends: where frames are drawn and how they reach the window.
+
+    surface   the default. The scene is drawn into a Surface in
+              software and copied to the display (or straight onto it,
+              or only its dirty rects).
+    texture   an SDL2 Renderer. Sprites, the atlas, glow stamps and text
+              are Textures uploaded once; the renderer's logical size is
+              WINDOW_SIZE, so any window size scales to fit.
+
+Both draw the same scene from the same World. Game only talks to a
+backend through open(), load(), present(), show() and invalidate().
+"""
+import pygame
+from simulation import WINDOW_SIZE, BLACK
+from render import Renderer, DirtyRectRenderer
+
+class SurfaceBackend:
+    """Software rendering into a Surface, presented with display.flip/update."""
+    name = 'surface'
+
+    def __init__(self, dirty_rects=False):
+        self.dirty_rects = dirty_rects
+        self.screen = None
+        self.game_surface = None
+        self.renderer = None
+        self.drawn_to_screen = False  # Last frame was drawn straight onto the screen
+
+    def open(self, title):
+        self.screen = pygame.display.set_mode(WINDOW_SIZE)
+        self.game_surface = pygame.Surface(WINDOW_SIZE)  # New surface for game rendering
+        pygame.display.set_caption(title)
+
+    def load(self, player_img, enemy_img, human_img, font):
+        # Dirty-rectangle rendering only pushes changed regions, for low-power machines
+        renderer_class = DirtyRectRenderer if self.dirty_rects else Renderer
+        self.renderer = renderer_class(player_img, enemy_img, human_img, font)
+        return self.renderer
+
+    def invalidate(self):
+        self.renderer.invalidate()
+
+    def present(self, world, alpha, overlay, profiler):
+        screen = self.screen
+        game_surface = self.game_surface
+        # With shake off and full redraws there's nothing to offset: draw on the screen itself
+        direct = not world.screen_shake.enabled and not self.dirty_rects
+        dirty = self.renderer.draw(screen if direct else game_surface, world, alpha)
+        self.drawn_to_screen = direct
+        profiler.lap('draw')
+
+        if dirty is None:
+            # Apply screen shake while drawing the final frame
+            if not direct:
+                world.screen_shake.apply(game_surface, screen)
+            profiler.lap('present')
+            if overlay:
+                overlay.draw(screen)
+                profiler.lap('overlay')
+            pygame.display.flip()
+        else:
+            for rect in dirty:
+                screen.blit(game_surface, rect, rect)
+            profiler.lap('present')
+            if overlay:
+                overlay_rect = overlay.draw(screen)
+                if overlay_rect:
+                    dirty.append(overlay_rect)
+                profiler.lap('overlay')
+            pygame.display.update(dirty)
+        profiler.lap('flip')
+
+    def show(self, layers, keep_frame=True):
+        """Present layers over the last game frame, or over black."""
+        if not keep_frame:
+            self.screen.fill(BLACK)
+        else:
+            if self.drawn_to_screen:
+                # Keep the frame for redraws while paused
+                self.game_surface.blit(self.screen, (0, 0))
+                self.drawn_to_screen = False
+            self.screen.blit(self.game_surface, (0, 0))
+        self.screen.blits(layers, doreturn=False)
+        pygame.display.flip()
+
+class TextureBackend:
+    """Hardware (or SDL software) rendering through pygame._sdl2's Renderer.
+
+    window_size sets the window's initial size; it is resizable and the
+    frame scales with it. driver picks an SDL render driver by name
+    ('opengl', 'software', ...); None lets SDL choose.
+    """
+    name = 'texture'
+
+    def __init__(self, window_size=None, driver=None, vsync=False):
+        self.window_size = window_size or WINDOW_SIZE
+        self.driver = driver
+        self.vsync = vsync
+        self.window = None
+        self.sdl = None
+        self.renderer = None
+        self.last_frame = None  # (world, alpha) of the last frame, for redraws under overlays
+
+    def open(self, title):
+        # pygame._sdl2 isn't in every build (web), so it's only imported when chosen
+        from pygame._sdl2.video import Window, Renderer as SDLRenderer
+        index = -1
+        if self.driver is not None:
+            names = render_drivers()
+            if self.driver not in names:
+                raise pygame.error(f"No SDL render driver {self.driver!r} (have {', '.join(names)})")
+            index = names.index(self.driver)
+        self.window = Window(title, size=self.window_size, resizable=True)
+        self.sdl = SDLRenderer(self.window, index=index, vsync=self.vsync)
+        self.sdl.logical_size = WINDOW_SIZE
+
+    def load(self, player_img, enemy_img, human_img, font):
+        from texture_render import TextureRenderer
+        self.renderer = TextureRenderer(self.sdl, player_img, enemy_img, human_img, font)
+        return self.renderer
+
+    def invalidate(self):
+        # Every frame is redrawn in full
+        pass
+
+    def shake_offset(self, world):
+        shake = world.screen_shake
+        return int(shake.shake_offset[0]), int(shake.shake_offset[1])
+
+    def present(self, world, alpha, overlay, profiler):
+        self.renderer.draw(world, alpha, self.shake_offset(world))
+        self.last_frame = (world, alpha)
+        profiler.lap('draw')
+        if overlay:
+            surface = overlay.current()
+            if surface is not None:
+                self.renderer.draw_surface(surface, overlay.pos, keep=False)
+            profiler.lap('overlay')
+        self.sdl.present()
+        profiler.lap('flip')
+
+    def show(self, layers, keep_frame=True):
+        """Present layers over the last game frame, or over black."""
+        if keep_frame and self.last_frame is not None:
+            world, alpha = self.last_frame
+            self.renderer.draw(world, alpha, self.shake_offset(world))
+        else:
+            self.renderer.clear()
+        for surface, pos in layers:
+            self.renderer.draw_surface(surface, pos)
+        self.sdl.present()
+
+def render_drivers():
+    """Names of the SDL render drivers this build has, in SDL's order."""
+    from pygame._sdl2.video import get_drivers
+    return [info.name for info in get_drivers()]
+
+BACKENDS = {
+    'surface': SurfaceBackend,
+    'texture': TextureBackend,
+}
@@ -0,0 +1,221 @@
+"""Balance sweeps: many headless games per parameter set, on every core.
+
+Each game is a World with its own Tuning and seed, played by a scripted
+BotPolicy until game over or a tick limit. Games run in batches on a
+ProcessPoolExecutor; finished batches are folded into per-column arrays
+as they arrive, and a summary per parameter set is printed as JSON.
+
+    python balance.py --games 500 --set enemy_spawn_delay=120,180,240 \\
+        --set rescue_distance=20,30 --output sweep.npz
+
+--set takes any Tuning field; sets are the cartesian product of all
+--set values. Run from the repository root (sprites load from assets/).
+"""
+import os
+import sys
+import argparse
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout pure JSON
+
+import pygame
+from simulation import World, Tuning, Inputs, PLAYER_SIZE, WINDOW_SIZE, TICK_RATE
+from enemies import ENEMY_SIZE
+from sprites import get_arrow_cache
+
+MAX_TICKS = 10 * 60 * TICK_RATE  # Games still running after 10 minutes are cut off
+BATCH_SIZE = 8  # Games per task; larger batches cost less in process overhead
+RESULT_COLUMNS = ('score', 'survival_s', 'humans_rescued', 'kills', 'lives_left', 'game_over')
+
+class BotPolicy:
+    """Scripted player: keeps away from close enemies, otherwise heads for
+    the nearest human, and always shoots at the nearest enemy.
+
+    Like a person, it only reacts every reaction_ticks ticks and keeps
+    its last inputs in between.
+    """
+
+    def __init__(self, flee_distance=60, reaction_ticks=12):
+        self.flee_distance = flee_distance
+        self.reaction_ticks = reaction_ticks
+        self.inputs = None
+
+    def __call__(self, world):
+        if self.inputs is not None and world.tick % self.reaction_ticks:
+            return self.inputs
+        self.inputs = self.decide(world)
+        return self.inputs
+
+    def decide(self, world):
+        player = world.player
+        px, py = (player.pos + PLAYER_SIZE / 2).tolist()
+        move_x = move_y = aim_x = aim_y = 0
+
+        n = len(world.enemies)
+        if n:
+            offsets = world.enemies.pos[:n] + ENEMY_SIZE / 2 - (px, py)
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+            nearest = int(distances.argmin())
+            dx, dy = offsets[nearest].tolist()
+            # Aim is a direction in [-1, 1] like a stick's, not a pixel offset
+            aim_x, aim_y = (offsets[nearest] / max(distances[nearest], 1e-9)).tolist()
+            if distances[nearest] < self.flee_distance:
+                move_x, move_y = -dx, -dy
+        if not (move_x or move_y):
+            if world.humans:
+                target = min(world.humans, key=lambda h: (h.pos[0] - px) ** 2 + (h.pos[1] - py) ** 2)
+                move_x, move_y = (target.pos - (px, py)).tolist()
+            else:
+                move_x, move_y = WINDOW_SIZE[0] / 2 - px, WINDOW_SIZE[1] / 2 - py
+        # Full-speed moves on each axis, with a little slack so the bot doesn't jitter
+        return Inputs((move_x > 2) - (move_x < -2), (move_y > 2) - (move_y < -2), aim_x, aim_y)
+
+def play_game(tuning, seed, max_ticks=MAX_TICKS, policy=None):
+    """Play one headless game; returns a dict of RESULT_COLUMNS."""
+    policy = policy or BotPolicy()
+    policy.inputs = None
+    world = World(seed=seed, effects=False, tuning=tuning)
+    while not world.game_over and world.tick < max_ticks:
+        world.step(policy(world))
+    return {
+        'score': world.score,
+        'survival_s': world.tick / TICK_RATE,
+        'humans_rescued': world.humans_rescued,
+        'kills': world.kills,
+        'lives_left': world.player_lives,
+        'game_over': world.game_over,
+    }
+
+def init_worker():
+    # Bullets need the arrow sprites; rotate them only as shots need them
+    pygame.init()
+    images = [pygame.image.load(os.path.join('assets', 'images', f'arrow{i}.png')) for i in range(1, 4)]
+    get_arrow_cache(images, lazy=True)
+
+def play_batch(set_index, params, seeds, max_ticks):
+    tuning = Tuning(**params)
+    policy = BotPolicy()
+    return set_index, seeds, [play_game(tuning, seed, max_ticks, policy) for seed in seeds]
+
+def parse_sets(assignments):
+    """Cartesian product of --set name=v1,v2 values as a list of Tuning kwargs."""
+    fields = Tuning.__slots__
+    axes = []
+    for assignment in assignments:
+        name, _, values = assignment.partition('=')
+        if name not in fields:
+            raise SystemExit(f"Unknown tuning parameter {name!r}; choose from {', '.join(fields)}")
+        axes.append([(name, json.loads(v)) for v in values.split(',')])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+class Columns:
+    """Per-game results as growing columns, one entry per finished game."""
+
+    def __init__(self, param_names):
+        self.param_names = param_names
+        self.data = {name: [] for name in ('set', 'seed') + tuple(param_names) + RESULT_COLUMNS}
+
+    def add(self, set_index, params, seeds, results):
+        data = self.data
+        data['set'].extend([set_index] * len(seeds))
+        data['seed'].extend(seeds)
+        for name in self.param_names:
+            data[name].extend([params[name]] * len(seeds))
+        for name in RESULT_COLUMNS:
+            data[name].extend(result[name] for result in results)
+
+    def arrays(self):
+        return {name: np.array(values) for name, values in self.data.items()}
+
+    def summary(self, sets):
+        arrays = self.arrays()
+        summary = []
+        for i, params in enumerate(sets):
+            games = arrays['set'] == i
+            row = {'params': params, 'games': int(games.sum())}
+            for name in RESULT_COLUMNS:
+                values = arrays[name][games].astype(float)
+                row[f'{name}_mean'] = float(values.mean()) if len(values) else None
+                if name in ('score', 'survival_s'):
+                    row[f'{name}_p10'] = float(np.percentile(values, 10)) if len(values) else None
+                    row[f'{name}_p90'] = float(np.percentile(values, 90)) if len(values) else None
+            summary.append(row)
+        return summary
+
+    def save(self, path):
+        arrays = self.arrays()
+        if path.endswith('.npz'):
+            np.savez_compressed(path, **arrays)
+        else:
+            with open(path, 'w') as f:
+                json.dump({name: values.tolist() for name, values in arrays.items()}, f)
+
+def sweep(sets, games, workers=None, max_ticks=MAX_TICKS, batch_size=BATCH_SIZE, seed=0, progress=None):
+    """Play `games` games for each parameter set across a process pool; returns Columns."""
+    param_names = sorted({name for params in sets for name in params})
+    columns = Columns(param_names)
+    # Same seeds for every set, so sets differ only in their parameters
+    seeds = list(range(seed, seed + games))
+    batches = [(i, params, seeds[start:start + batch_size])
+               for start in range(0, games, batch_size)
+               for i, params in enumerate(sets)]
+    total = len(batches)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        # Keep a bounded number of batches in flight and fold results in as they land
+        limit = workers * 2
+        pending = set()
+        done_batches = 0
+        while batches or pending:
+            while batches and len(pending) < limit:
+                set_index, params, batch_seeds = batches.pop(0)
+                pending.add(pool.submit(play_batch, set_index, params, batch_seeds, max_ticks))
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                set_index, batch_seeds, results = future.result()
+                columns.add(set_index, sets[set_index], batch_seeds, results)
+                done_batches += 1
+                if progress:
+                    progress(done_batches, total)
+    return columns
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless games across parameter sets")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=V1,V2',
+                        help="tuning parameter values to sweep (repeatable)")
+    parser.add_argument('--games', type=int, default=100, help="games per parameter set")
+    parser.add_argument('--workers', type=int, help="processes (default: all cores)")
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=0, help="first game seed")
+    parser.add_argument('--output', help="write per-game columns to PATH (.npz or .json)")
+    args = parser.parse_args(argv)
+
+    sets = parse_sets(args.set)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} batches", end='', file=sys.stderr, flush=True)
+
+    columns = sweep(sets, args.games, args.workers, args.max_ticks, args.batch_size, args.seed, progress)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    if args.output:
+        columns.save(args.output)
+    played = len(columns.data['seed'])
+    print(json.dumps({
+        'games': played,
+        'seconds': elapsed,
+        'games_per_s': played / elapsed,
+        'sets': columns.summary(sets),
+    }, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
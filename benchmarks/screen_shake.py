@@ -0,0 +1,84 @@
+"""Per-frame cost of presenting the game surface through ScreenShake.
+
+Compares the old copy-then-blit path with ScreenShake.apply, idle and
+while shaking. Surface copies are counted by a Surface subclass;
+Python heap use is measured with tracemalloc.
+
+    python benchmarks/screen_shake.py [frames]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from particles import ScreenShake
+
+WINDOW_SIZE = (800, 600)
+
+class CountingSurface(pygame.Surface):
+    """Surface that counts the pixel bytes allocated by copying it."""
+    copies = 0
+    copied_bytes = 0
+
+    def copy(self):
+        CountingSurface.copies += 1
+        CountingSurface.copied_bytes += self.get_width() * self.get_height() * self.get_bytesize()
+        return super().copy()
+
+def legacy_apply(shake, surface, target):
+    # The previous ScreenShake.apply: copy the frame, then blit it at the offset
+    target.blit(surface.copy(), shake.shake_offset)
+
+def current_apply(shake, surface, target):
+    shake.apply(surface, target)
+
+def measure(apply, shaking, frames, warmup=60):
+    screen = pygame.display.get_surface()
+    game_surface = CountingSurface(WINDOW_SIZE)
+    shake = ScreenShake()
+
+    def frame():
+        if shaking:
+            shake.start_shake(3)
+        shake.update()
+        apply(shake, game_surface, screen)
+
+    for _ in range(warmup):
+        frame()
+    CountingSurface.copies = CountingSurface.copied_bytes = 0
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    elapsed = time.perf_counter() - start
+    end_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        'ms_per_frame': elapsed * 1000 / frames,
+        'surface_copies_per_frame': CountingSurface.copies / frames,
+        'copied_bytes_per_frame': CountingSurface.copied_bytes / frames,
+        'retained_heap_bytes': end_bytes - start_bytes,
+    }
+
+def run(frames=600):
+    pygame.display.init()
+    pygame.display.set_mode(WINDOW_SIZE)
+    results = {}
+    for name, apply in (('legacy', legacy_apply), ('current', current_apply)):
+        for state, shaking in (('idle', False), ('shaking', True)):
+            results[f'{name}_{state}'] = measure(apply, shaking, frames)
+    return results
+
+if __name__ == '__main__':
+    results = run(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
+    for name, stats in results.items():
+        print(f"{name:16} " + "  ".join(f"{k}={v:.3f}" for k, v in stats.items()))
+    steady = results['current_idle']
+    # A few bytes of tracemalloc bookkeeping show up regardless of frame count
+    if steady['surface_copies_per_frame'] or steady['retained_heap_bytes'] > 256:
+        sys.exit("ScreenShake allocates in the steady state")
@@ -0,0 +1,417 @@
+"""Headless stress scenarios for the simulation and the draw path.
+
+Each scenario drives a seeded World under the SDL dummy drivers, timing
+every simulation phase (through the World's profiler hook), the renderer
+and the final present separately.
+It reports ms/frame per subsystem, frame time percentiles, throughput,
+Python allocations (tracemalloc), GC collections and pause times, and
+pool occupancy as JSON on stdout. --gc-idle runs the timed frames with
+the collector that robotron.py --gc-idle uses. --backend texture draws
+through robotron.py's SDL2 Renderer backend instead, with SDL's
+software renderer by default (under the offscreen video driver, since
+the dummy one has no renderer).
+
+Every scenario runs --runs times and reports the median of each
+subsystem. Results are compared against a baseline, and any subsystem
+that got slower by more than the tolerance makes the run exit with
+status 1; a baseline recorded with other settings (scale, quality,
+--gc-idle, backend) is refused with status 2. Baselines are machine
+specific and untracked: the first run records one, and
+--update-baseline records it again.
+
+    python benchmarks/stress.py [--scenario NAME ...] [--scale 0.1] [--runs 1]
+    python benchmarks/stress.py --update-baseline
+    python benchmarks/stress.py --replay session.rbr
+
+Recordings made with `robotron.py --record` replay as scenarios of
+their own, with the recorded seed and inputs instead of the bot. The
+fixtures in benchmarks/replays run by default.
+"""
+import os
+import sys
+import argparse
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout pure JSON
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import pygame
+import numpy as np
+from simulation import World, Inputs, NO_INPUT, WINDOW_SIZE, TICK_RATE
+from sprites import get_arrow_cache
+from render import Renderer
+from backends import TextureBackend
+from replay import load_recording
+from collector import IdleCollector
+from quality import QUALITY_TIERS
+from profiler import FrameProfiler, FRAME_BUDGET_MS  # Frame time the game targets; the rest is idle time for --gc-idle
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replays')
+TOLERANCE = 0.25  # Allowed slowdown relative to the baseline
+MIN_DELTA_MS = 0.25  # Slowdowns smaller than this (1.5% of the frame budget) are noise
+RUNS = 3  # Runs per scenario; each subsystem's median is compared
+SETTINGS = {'scale': 1.0, 'gc_idle': False, 'quality': 0, 'backend': 'surface'}  # Must match the baseline's
+ALLOC_FRAMES = 20  # Frames run under tracemalloc, after the timed frames
+
+def keep_alive(world):
+    # Stress scenarios measure load, not gameplay: the player never dies
+    world.invincible = True
+    world.invincible_timer = TICK_RATE
+
+def edge_positions(rng, n):
+    # Random points along the screen edges, where enemies spawn
+    x = rng.uniform(0, WINDOW_SIZE[0], n)
+    y = rng.uniform(0, WINDOW_SIZE[1], n)
+    side = rng.integers(0, 4, n)
+    x[side == 0] = -20
+    x[side == 1] = WINDOW_SIZE[0] + 20
+    y[side == 2] = -20
+    y[side == 3] = WINDOW_SIZE[1] + 20
+    return np.stack([x, y], axis=1)
+
+def top_up_enemies(world, rng, count):
+    missing = count - len(world.enemies)
+    if missing > 0:
+        for x, y in edge_positions(rng, missing).tolist():
+            world.enemies.add(x, y)
+
+def top_up_bullets(world, rng, count):
+    missing = count - len(world.bullets)
+    for _ in range(max(0, missing)):
+        angle = rng.uniform(0, 2 * np.pi)
+        world.bullets.fire(rng.uniform(0, WINDOW_SIZE[0]), rng.uniform(0, WINDOW_SIZE[1]),
+                           np.cos(angle), np.sin(angle), int(rng.integers(1, 4)))
+
+def explosions(world, rng, n):
+    for x, y in zip(rng.uniform(0, WINDOW_SIZE[0], n), rng.uniform(0, WINDOW_SIZE[1], n)):
+        world.particles.create_explosion(x, y, (255, 100, 0))
+    world.screen_shake.start_shake(3)
+
+def particles_10k(world, rng, frame):
+    keep_alive(world)
+    missing = 10000 - len(world.particles)
+    if missing > 0:
+        explosions(world, rng, missing // 20 + 1)
+
+def enemies_2k(world, rng, frame):
+    keep_alive(world)
+    top_up_enemies(world, rng, 2000)
+
+def bullets_500(world, rng, frame):
+    keep_alive(world)
+    top_up_enemies(world, rng, 200)
+    top_up_bullets(world, rng, 500)
+
+def explosion_storm(world, rng, frame):
+    keep_alive(world)
+    top_up_enemies(world, rng, 100)
+    explosions(world, rng, 25)
+
+def top_up_horde(world, rng, count):
+    # Spread out over a wide area around the screen, most of it off screen
+    missing = count - len(world.enemies)
+    if missing > 0:
+        for x, y in zip(rng.uniform(-WINDOW_SIZE[0], WINDOW_SIZE[0] * 2, missing).tolist(),
+                        rng.uniform(-WINDOW_SIZE[1], WINDOW_SIZE[1] * 2, missing).tolist()):
+            world.enemies.add(x, y)
+
+def horde_1k(world, rng, frame):
+    keep_alive(world)
+    top_up_horde(world, rng, 1000)
+
+def horde_8k(world, rng, frame):
+    keep_alive(world)
+    top_up_horde(world, rng, 8000)
+
+def long_session(world, rng, frame):
+    keep_alive(world)
+
+def no_driver(world, rng, frame):
+    pass
+
+def bot_inputs(frame):
+    # Circle the arena, shooting in a slowly rotating direction
+    phase = frame // 30
+    move = ((1, 0), (0, 1), (-1, 0), (0, -1))[phase % 4]
+    aim = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))[phase % 8]
+    return Inputs(move[0], move[1], aim[0], aim[1])
+
+# name: (frames, per-frame driver); frames are scaled by --scale
+SCENARIOS = {
+    'particles_10k': (600, particles_10k),
+    'enemies_2k': (600, enemies_2k),
+    'bullets_500': (600, bullets_500),
+    'explosion_storm': (600, explosion_storm),
+    'long_session': (18000, long_session),
+    'horde_1k': (600, horde_1k),
+    'horde_8k': (600, horde_8k),
+}
+HORDE_SCENARIOS = {'horde_1k', 'horde_8k'}  # Run with World(horde=True); their costs should match
+
+def load_sprites():
+    def load(name):
+        image = pygame.image.load(os.path.join(ROOT, 'assets', 'images', name))
+        # The texture backend has no display surface to convert for
+        return image.convert_alpha() if pygame.display.get_surface() is not None else image
+    get_arrow_cache([load(f'arrow{i}.png') for i in range(1, 4)])
+    return load('player.png'), load('enemy.png'), load('human.png')
+
+def entity_count(world):
+    return len(world.enemies) + len(world.bullets) + len(world.humans) + len(world.particles)
+
+class Run:
+    """One scenario: a world, a renderer and the per-subsystem timings."""
+
+    def __init__(self, driver, sprites, font, seed=0, inputs=bot_inputs, horde=False, quality=0, backend=None):
+        self.driver = driver
+        self.inputs = inputs
+        self.world = World(seed=seed, horde=horde)
+        # World.step laps every phase on its profiler; render and present are lapped here
+        self.profiler = self.world.profiler = FrameProfiler(enabled=True)
+        QUALITY_TIERS[quality].apply(self.world)
+        self.rng = np.random.default_rng(seed)
+        self.backend = backend  # A TextureBackend, or None to draw into a Surface
+        self.renderer = backend.load(*sprites, font) if backend else Renderer(*sprites, font)
+        self.surface = pygame.Surface(WINDOW_SIZE)
+        self.screen = pygame.display.get_surface()
+        self.frame = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.times = {name: 0.0 for name, _ in self.world.phases}
+        self.times['render'] = 0.0
+        self.times['present'] = 0.0
+        self.frame_ms = []
+        self.entities = 0
+
+    def step(self):
+        # One frame: a World.step, then draw and present
+        world = self.world
+        profiler = self.profiler
+        self.driver(world, self.rng, self.frame)
+        profiler.begin_frame()
+        world.step(self.inputs(self.frame))
+        backend = self.backend
+        if backend:
+            self.renderer.draw(world, 1.0, backend.shake_offset(world))
+        else:
+            self.renderer.draw(self.surface, world)
+        profiler.lap('render')
+        if backend:
+            backend.sdl.present()
+        else:
+            world.screen_shake.apply(self.surface, self.screen)
+        profiler.lap('present')
+        # The laps cover the whole frame; the profiler's own ring buffers aren't needed
+        times = self.times
+        for name, ms in profiler.current.items():
+            times[name] += ms
+        self.frame_ms.append(sum(profiler.current.values()))
+        self.entities += entity_count(world)
+        self.frame += 1
+
+def replay_inputs(recording):
+    # Inputs by frame number; past the end of the recording the player stands still
+    inputs = list(recording.inputs())
+    return lambda frame: inputs[frame] if frame < len(inputs) else NO_INPUT
+
+def run_scenario(driver, frames, sprites, font, seed=0, inputs=bot_inputs, warmup=60, gc_idle=False,
+                 horde=False, quality=0, backend=None):
+    run = Run(driver, sprites, font, seed, inputs, horde, quality, backend)
+    for _ in range(min(warmup, frames)):  # Warm caches and fill the scene before timing
+        run.step()
+    run.reset_stats()
+    collector = IdleCollector()
+    if gc_idle:
+        collector.freeze()
+        collector.start()
+    collections = sum(s['collections'] for s in gc.get_stats())
+    start = time.perf_counter()
+    for _ in range(frames):
+        run.step()
+        if gc_idle:
+            collector.idle(FRAME_BUDGET_MS - run.frame_ms[-1])
+    elapsed = time.perf_counter() - start
+    collections = sum(s['collections'] for s in gc.get_stats()) - collections
+    gc_stats = collector.stats()
+    collector.close()
+    if gc_idle:
+        gc.unfreeze()
+    frame_ms = np.array(run.frame_ms)
+    ms = {k: v / frames for k, v in run.times.items()}
+    ms['total'] = float(frame_ms.mean())
+    entities = run.entities
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(ALLOC_FRAMES):
+        run.step()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tenth = max(1, frames // 10)
+    return {
+        'frames': frames,
+        'ms_per_frame': ms,
+        'frame_ms_p50': float(np.percentile(frame_ms, 50)),
+        'frame_ms_p95': float(np.percentile(frame_ms, 95)),
+        'frame_ms_p99': float(np.percentile(frame_ms, 99)),
+        # Last tenth over first tenth of the run; > 1 means frames got slower over time
+        'drift': float(frame_ms[-tenth:].mean() / frame_ms[:tenth].mean()),
+        'throughput': {
+            'frames_per_s': frames / elapsed,
+            'entity_updates_per_s': entities / elapsed,
+            'mean_entities': entities / frames,
+        },
+        'alloc': {
+            'peak_kb': (peak - before) / 1024,
+            'retained_bytes_per_frame': (current - before) / ALLOC_FRAMES,
+            'gc_collections': collections,
+        },
+        'gc': gc_stats,
+        'pools': run.world.pool_stats(),
+    }
+
+def median_result(runs):
+    """The run with the median total, with each subsystem's median ms/frame across all runs."""
+    runs = sorted(runs, key=lambda r: r['ms_per_frame']['total'])
+    result = runs[len(runs) // 2]
+    result['ms_per_frame'] = {k: float(np.median([r['ms_per_frame'][k] for r in runs]))
+                              for k in result['ms_per_frame']}
+    result['runs'] = len(runs)
+    return result
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA_MS):
+    """List of regressions: subsystems slower than baseline * (1 + tolerance).
+
+    Raises ValueError if the baseline was recorded with other SETTINGS,
+    whose timings aren't comparable.
+    """
+    for key, default in SETTINGS.items():
+        base, ours = baseline.get(key, default), results.get(key, default)
+        if base != ours:
+            raise ValueError(f"it was recorded with {key}={base!r}, this run used {ours!r}")
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        for subsystem, base_ms in base['ms_per_frame'].items():
+            ms = result['ms_per_frame'].get(subsystem)
+            if ms is not None and ms > base_ms * (1 + tolerance) and ms - base_ms > min_delta:
+                regressions.append(f"{name}/{subsystem}: {ms:.3f} ms/frame vs baseline {base_ms:.3f}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable); default all unless --replay is given")
+    parser.add_argument('--replay', action='append', metavar='PATH',
+                        help="run a recorded game as a scenario (repeatable); default the fixtures in benchmarks/replays")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every scenario's frame count")
+    parser.add_argument('--runs', type=int, default=RUNS,
+                        help="runs per scenario; medians are reported (default %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="allowed slowdown as a fraction of the baseline (default %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store these results as the baseline (done automatically when there is none)")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--gc-idle', action='store_true',
+                        help="freeze startup objects and collect only in frames that beat the %.1f ms budget"
+                             % FRAME_BUDGET_MS)
+    parser.add_argument('--quality', type=int, default=0, choices=range(len(QUALITY_TIERS)), metavar='TIER',
+                        help="effects quality tier to run at (default 0, full)")
+    parser.add_argument('--backend', choices=('surface', 'texture'), default='surface',
+                        help="draw into a Surface (default) or through the SDL2 Renderer backend")
+    parser.add_argument('--render-driver', default='software', metavar='NAME',
+                        help="SDL render driver for --backend texture (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if args.backend == 'texture':
+        if os.environ['SDL_VIDEODRIVER'] == 'dummy':
+            os.environ['SDL_VIDEODRIVER'] = 'offscreen'
+        backend = TextureBackend(driver=args.render_driver)
+    pygame.display.init()
+    pygame.font.init()
+    if backend:
+        backend.open('stress')
+    else:
+        pygame.display.set_mode(WINDOW_SIZE)
+    sprites = load_sprites()
+    font = pygame.font.Font(None, 36)
+
+    results = {
+        'env': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'scale': args.scale,
+        'gc_idle': args.gc_idle,
+        'quality': args.quality,
+        'backend': args.backend,
+        'scenarios': {},
+    }
+    jobs = []
+    everything = not (args.scenario or args.replay)
+    for name in SCENARIOS if everything else args.scenario or []:
+        frames, driver = SCENARIOS[name]
+        jobs.append((name, driver, max(1, int(frames * args.scale)), args.seed, bot_inputs, 60,
+                     name in HORDE_SCENARIOS))
+    replays = args.replay or []
+    if everything and os.path.isdir(REPLAY_DIR):
+        replays = sorted(os.path.join(REPLAY_DIR, f) for f in os.listdir(REPLAY_DIR) if f.endswith('.rbr'))
+    for path in replays:
+        # Recordings run from their first tick, in full, with their own seed
+        recording = load_recording(path)
+        name = 'replay:' + os.path.splitext(os.path.basename(path))[0]
+        jobs.append((name, no_driver, recording.ticks, recording.seed, replay_inputs(recording), 0,
+                     recording.metadata.get('horde', False)))
+    for name, driver, frames, seed, inputs, warmup, horde in jobs:
+        result = median_result([run_scenario(driver, frames, sprites, font, seed, inputs, warmup, args.gc_idle,
+                                             horde, args.quality, backend) for _ in range(max(1, args.runs))])
+        results['scenarios'][name] = result
+        ms = result['ms_per_frame']
+        print(f"{name:16} {ms['total']:7.3f} ms/frame  " +
+              "  ".join(f"{k}={v:.3f}" for k, v in ms.items() if k != 'total'), file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    pygame.quit()
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        # Baselines are machine specific, so the first run on a machine records its own
+        with open(args.baseline, 'w') as f:
+            f.write(output + '\n')
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    try:
+        regressions = compare(results, baseline, args.tolerance)
+    except ValueError as e:
+        print(f"Not comparing against {args.baseline}: {e}. Record a matching baseline with "
+              f"--update-baseline, or pass another with --baseline", file=sys.stderr)
+        return 2
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Garbage-collector control: freeze startup objects, collect when idle.
+
+CPython's cyclic collector runs whenever allocations pass a threshold,
+which in a busy wave means in the middle of a frame. IdleCollector
+moves that work to the end of frames that finished early:
+
+    collector = IdleCollector()
+    collector.freeze()        # after startup: sprites, fonts, sounds
+    collector.start()         # automatic collection off
+    ...
+    collector.idle(idle_ms)   # once per frame, with the time left
+
+A collection is skipped while the frame has less than min_idle_ms to
+spare, but never for long: once the youngest generation is
+force_factor times over its threshold it is collected regardless, so
+memory stays bounded under sustained load. Every collection, ours or
+automatic, is timed through gc.callbacks for stats().
+"""
+import gc
+import time
+import numpy as np
+
+MIN_IDLE_MS = 2.0
+FORCE_FACTOR = 4
+PAUSE_HISTORY = 600
+
+class IdleCollector:
+    """Schedules cyclic garbage collection into idle frame time."""
+
+    def __init__(self, min_idle_ms=MIN_IDLE_MS, force_factor=FORCE_FACTOR, history=PAUSE_HISTORY):
+        self.min_idle_ms = min_idle_ms
+        self.force_factor = force_factor
+        self.active = False
+        self.frozen = 0
+        # Ring buffer of recent pause lengths, plus running totals
+        self.pauses = np.zeros(history, dtype=np.float64)
+        self.pause_count = 0
+        self.pause_total_ms = 0.0
+        self.pause_max_ms = 0.0
+        self.collections = [0, 0, 0]
+        self.idle_collections = 0
+        self.forced_collections = 0
+        self._pause_start = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._pause_start = time.perf_counter()
+            return
+        if self._pause_start is None:
+            return
+        ms = (time.perf_counter() - self._pause_start) * 1000
+        self._pause_start = None
+        self.pauses[self.pause_count % len(self.pauses)] = ms
+        self.pause_count += 1
+        self.pause_total_ms += ms
+        self.pause_max_ms = max(self.pause_max_ms, ms)
+        generation = info['generation']
+        if generation < len(self.collections):
+            self.collections[generation] += 1
+
+    def freeze(self):
+        """Move every object alive now into the permanent generation.
+
+        Call once startup has loaded everything long-lived; collections
+        then never traverse those objects again.
+        """
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+
+    def start(self):
+        """Turn automatic collection off; idle() does the collecting."""
+        gc.disable()
+        self.active = True
+
+    def stop(self):
+        gc.enable()
+        self.active = False
+
+    def close(self):
+        self.stop()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def pending_generation(self):
+        """The generation automatic collection would pick now, or None."""
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+        if counts[0] <= thresholds[0]:
+            return None
+        for generation in (2, 1):
+            if thresholds[generation] and counts[generation] > thresholds[generation]:
+                return generation
+        return 0
+
+    def idle(self, idle_ms):
+        """Collect if anything is due and the frame has idle_ms to spare.
+
+        Returns the generation collected, or None.
+        """
+        if not self.active:
+            return None
+        generation = self.pending_generation()
+        if generation is None:
+            return None
+        if idle_ms < self.min_idle_ms:
+            # No time this frame; wait unless garbage has piled up too far
+            if gc.get_count()[0] < gc.get_threshold()[0] * self.force_factor:
+                return None
+            self.forced_collections += 1
+        else:
+            self.idle_collections += 1
+        gc.collect(generation)
+        return generation
+
+    def stats(self):
+        n = min(self.pause_count, len(self.pauses))
+        recent = self.pauses[:n]
+        return {
+            'mode': 'idle' if self.active else 'automatic',
+            'frozen_objects': self.frozen,
+            'collections': list(self.collections),
+            'idle_collections': self.idle_collections,
+            'forced_collections': self.forced_collections,
+            'pause_total_ms': self.pause_total_ms,
+            'pause_max_ms': self.pause_max_ms,
+            'pause_p95_ms': float(np.percentile(recent, 95)) if n else 0.0,
+        }
@@ -0,0 +1,217 @@
+import numpy as np
+from entities import Entity, EntityStore, ENEMY, DEAD
+
+ENEMY_SIZE = 32
+ENEMY_SPEED = 2
+
+# Steering behaviors
+SEEK = 0     # Head straight for the target
+ZIGZAG = 1   # Seek while weaving side to side
+WANDER = 2   # Drift on a slowly turning heading that leans towards the target
+
+ZIGZAG_AMPLITUDE = 0.8
+ZIGZAG_RATE = 0.15
+WANDER_TURN = 0.3
+WANDER_PULL = 0.05
+
+# Everything that collides with enemies (player, bullets, humans) stays within
+# the store's bounds, so enemies further than this outside them aren't checked
+COLLISION_MARGIN = 64
+
+class HordeLOD:
+    """Level-of-detail settings for horde mode.
+
+    Enemies more than margin pixels outside the screen, or further than
+    far_distance from the player when it is set, only steer every
+    stride ticks, moving stride ticks' worth each time. Each enemy gets
+    a fixed offset into the stride, so the work is spread evenly over
+    the ticks. The renderer draws crowds of more than aggregate_above
+    visible enemies as one sprite per aggregate_cell pixels, and
+    off-screen enemies as markers along the screen edge.
+    """
+    __slots__ = ('stride', 'margin', 'far_distance', 'aggregate_above', 'aggregate_cell')
+
+    def __init__(self, stride=4, margin=COLLISION_MARGIN, far_distance=None,
+                 aggregate_above=400, aggregate_cell=32):
+        self.stride = stride
+        self.margin = margin
+        self.far_distance = far_distance
+        self.aggregate_above = aggregate_above
+        self.aggregate_cell = aggregate_cell
+
+class Enemy(Entity):
+    """Thin handle onto one slot of an EnemyStore."""
+    __slots__ = ()
+
+    @property
+    def speed(self):
+        return float(self.store.speed[self.index])
+
+    @speed.setter
+    def speed(self, value):
+        self.store.speed[self.index] = value
+
+    @property
+    def behavior(self):
+        return int(self.store.behavior[self.index])
+
+class EnemyStore(EntityStore):
+    """All enemies, with speeds, behaviors and steering state as extra components.
+
+    update() steers every enemy in one vectorized pass. version changes
+    whenever enemies are added, moved or removed, so collision indexes
+    know when to rebuild.
+    """
+    EXTRA_COMPONENTS = {
+        'speed': ((), np.float64),
+        'behavior': ((), np.int8),
+        'phase': ((), np.float64),
+        'heading': ((2,), np.float64),
+        'lod_offset': ((), np.int16),  # Tick offset into the horde LOD stride, below stride
+    }
+    handle_class = Enemy
+    pool_limit = 256
+
+    def __init__(self, capacity=64, rng=None, lod=None, bounds=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.bounds = bounds  # Rect that everything enemies collide with stays in; None for anywhere
+        self.lod = lod  # A HordeLOD, or None to update every enemy every tick
+        self.added = 0
+        self.updated = 0  # Enemies steered by the last update()
+        self.version = 0
+        self.views = {}  # Margin -> bounds inflated by it
+        super().__init__(ENEMY, capacity)
+
+    def add(self, x, y, speed=ENEMY_SPEED, behavior=SEEK):
+        enemy = super().add(x, y, ENEMY_SIZE, ENEMY_SIZE)
+        i = enemy.index
+        self.speed[i] = speed
+        self.behavior[i] = behavior
+        self.phase[i] = self.rng.uniform(0, 2 * np.pi)
+        angle = self.rng.uniform(0, 2 * np.pi)
+        self.heading[i] = (np.cos(angle), np.sin(angle))
+        if self.lod is not None:
+            self.lod_offset[i] = self.added % self.lod.stride
+        self.added += 1
+        self.version += 1
+        return enemy
+
+    def remove(self, handle):
+        super().remove(handle)
+        self.version += 1
+
+    def update(self, target, tick=0):
+        n = self.count
+        self.updated = n
+        if n == 0:
+            return
+        self.version += 1
+        pos = self.pos[:n]
+        self.prev_pos[:n] = pos
+        target = np.asarray(target, dtype=np.float64)
+        if self.lod is None:
+            self._steer(slice(0, n), target)
+            return
+        lod = self.lod
+        far = ~self.near_mask(lod.margin)
+        if lod.far_distance is not None:
+            delta = target - pos
+            far |= np.hypot(delta[:, 0], delta[:, 1]) > lod.far_distance
+        if not far.any():
+            self._steer(slice(0, n), target)
+            return
+        # Far enemies take turns: each steers on one tick of every stride, for stride ticks
+        due = ~far | ((tick + self.lod_offset[:n]) % lod.stride == 0)
+        steps = np.where(far, lod.stride, 1)
+        active = np.flatnonzero(due)
+        self.updated = len(active)
+        self.vel[:n][~due] = 0
+        if len(active):
+            self._steer(active, target, steps[active])
+
+    def _steer(self, sel, target, steps=None):
+        # Steer the enemies in sel (a slice or index array) and move them
+        pos = self.pos[sel]
+        delta = target - pos
+        dist = np.maximum(1, np.hypot(delta[:, 0], delta[:, 1]))
+        direction = delta / dist[:, None]
+
+        behavior = self.behavior[sel]
+        if behavior.any():
+            zig = behavior == ZIGZAG
+            if zig.any():
+                phase = self.phase[sel]
+                phase[zig] += ZIGZAG_RATE
+                weave = np.sin(phase[zig])[:, None] * ZIGZAG_AMPLITUDE
+                seek = direction[zig]
+                steer = seek + np.column_stack((-seek[:, 1], seek[:, 0])) * weave
+                direction[zig] = steer / np.linalg.norm(steer, axis=1)[:, None]
+                self.phase[sel] = phase
+            wander = behavior == WANDER
+            if wander.any():
+                heading = self.heading[sel]
+                turn = self.rng.normal(0, WANDER_TURN, (int(wander.sum()), 2))
+                steer = heading[wander] + turn * 0.1 + direction[wander] * WANDER_PULL
+                steer /= np.maximum(np.linalg.norm(steer, axis=1), 1e-9)[:, None]
+                heading[wander] = steer
+                direction[wander] = steer
+                self.heading[sel] = heading
+
+        vel = direction * self.speed[sel, None]
+        self.vel[sel] = vel
+        if steps is not None:
+            vel = vel * steps[:, None]
+        self.pos[sel] = pos + vel
+
+    def near_mask(self, margin=COLLISION_MARGIN):
+        """Mask of the enemies whose rect is within margin of bounds."""
+        if self.bounds is None:
+            return np.ones(self.count, dtype=bool)
+        view = self.views.get(margin)
+        if view is None:
+            view = self.views[margin] = self.bounds.inflate(margin * 2, margin * 2)
+        xy = self.rect_positions()
+        size = self.size[:self.count]
+        return ((xy[:, 0] + size[:, 0] > view.left) & (xy[:, 0] < view.right) &
+                (xy[:, 1] + size[:, 1] > view.top) & (xy[:, 1] < view.bottom))
+
+class EnemyIndex:
+    """Stand-in for a SpatialHash of an EnemyStore's nearby enemies.
+
+    build() snapshots the nearby enemies' rects into arrays; query(),
+    collide() and collide_box() test all of them against a rect or box
+    in one vectorized pass and return the overlapping handles in slot
+    order. Nothing is done per enemy in Python except for the hits, so
+    horde mode uses this instead of the grid.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.slots = np.zeros(0, dtype=np.intp)
+        self.min = self.max = np.zeros((0, 2), dtype=np.int32)
+
+    def build(self):
+        store = self.store
+        near = store.near_mask()
+        if store.pending_dead:
+            near &= (store.flags[:store.count] & DEAD) == 0
+        self.slots = np.flatnonzero(near)
+        self.min = store.rect_positions()[near]
+        self.max = self.min + store.size[:store.count][near]
+
+    def query(self, rect):
+        return self.collide_box((rect.left, rect.top, rect.right, rect.bottom))
+
+    def collide_box(self, box):
+        left, top, right, bottom = box
+        lo, hi = self.min, self.max
+        hit = np.flatnonzero((lo[:, 0] < right) & (hi[:, 0] > left) &
+                             (lo[:, 1] < bottom) & (hi[:, 1] > top))
+        if not len(hit):
+            return []
+        handles = self.store.handles
+        return [handles[slot] for slot in self.slots[hit].tolist()]
+
+    # Hits are exact overlaps already
+    collide = query
+
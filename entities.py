@@ -0,0 +1,318 @@
+"""Array-backed entity storage shared by the simulation and game.py.
+
+An EntityStore keeps one kind of entity in parallel NumPy arrays, one
+per component: position, previous position, velocity, size, kind and
+flags, plus any extra components a subclass declares. Code that wants
+object-style access gets an Entity handle: a __slots__ object holding
+only the store and its slot index. Collision rects are built from the
+position and size arrays when asked for, so there is no second copy of
+the state to keep in sync.
+"""
+import pygame
+import numpy as np
+from sprites import get_arrow_cache
+
+# Entity kinds
+PLAYER = 0
+BULLET = 1
+ENEMY = 2
+HUMAN = 3
+
+# Flag bits
+ALIVE = 1
+DEAD = 2  # Killed this tick; removed by the next remove_dead()
+
+BULLET_SPEED = 10
+SMALL_BATCH = 16  # Up to this many entities, per-entity Python beats per-call NumPy overhead
+
+def round_positions(pos):
+    # Round half away from zero, as pygame does when a Rect is given floats
+    return (pos + np.copysign(0.5, pos)).astype(np.int32)  # astype truncates towards zero
+
+class Entity:
+    """Thin handle onto one slot of an EntityStore."""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def rect(self):
+        """A new collision Rect at the current position; writing to it moves nothing."""
+        store = self.store
+        i = self.index
+        pos = store.pos
+        rect = pygame.Rect(0, 0, store.size.item(i, 0), store.size.item(i, 1))
+        # Assignment rounds floats half away from zero like round_positions; Rect() truncates
+        rect.topleft = (pos.item(i, 0), pos.item(i, 1))
+        return rect
+
+    @property
+    def pos(self):
+        return self.store.pos[self.index]
+
+    @property
+    def prev_pos(self):
+        return self.store.prev_pos[self.index]
+
+    @property
+    def vel(self):
+        return self.store.vel[self.index]
+
+    @property
+    def kind(self):
+        return int(self.store.kind[self.index])
+
+    @property
+    def dead(self):
+        return bool(self.store.flags[self.index] & DEAD)
+
+    def kill(self):
+        store = self.store
+        store.flags[self.index] |= DEAD
+        store.pending_dead = True
+
+class EntityStore:
+    """Entities of one kind, with their components in typed arrays.
+
+    Removal swaps the last entity into the freed slot, which keeps the
+    arrays dense in O(1); stores that set stable = True compact instead,
+    keeping entities in the order they were added.
+    """
+    COMPONENTS = {
+        'pos': ((2,), np.float64),
+        'prev_pos': ((2,), np.float64),  # Before the last update, for interpolation
+        'vel': ((2,), np.float64),
+        'size': ((2,), np.int16),
+        'kind': ((), np.int8),
+        'flags': ((), np.uint8),
+    }
+    EXTRA_COMPONENTS = {}  # Per-kind components declared by subclasses
+    handle_class = Entity
+    stable = False
+    pool_limit = 0  # Removed handles kept for reuse by add(); 0 turns pooling off
+
+    def __init__(self, kind, capacity=64):
+        self.kind_id = kind
+        self.components = dict(self.COMPONENTS, **self.EXTRA_COMPONENTS)
+        self.count = 0
+        self.handles = []
+        self.pending_dead = False  # Set by kill(), so remove_dead() is free when nothing died
+        self.free = []
+        self.allocated = 0
+        self.reused = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        for name, (shape, dtype) in self.components.items():
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+    def _arrays(self):
+        return [getattr(self, name) for name in self.components]
+
+    def add(self, x, y, w, h, vx=0.0, vy=0.0):
+        if self.count == self.capacity:
+            old = self._arrays()
+            self._allocate(self.capacity * 2)
+            for new_arr, old_arr in zip(self._arrays(), old):
+                new_arr[:self.count] = old_arr[:self.count]
+        i = self.count
+        self.pos[i] = (x, y)
+        self.prev_pos[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.size[i] = (w, h)
+        self.kind[i] = self.kind_id
+        self.flags[i] = ALIVE
+        if self.free:
+            # Recycle a removed handle instead of building a new one
+            handle = self.free.pop()
+            handle.index = i
+            self.reused += 1
+        else:
+            handle = self.handle_class(self, i)
+            self.allocated += 1
+        self.handles.append(handle)
+        self.count += 1
+        return handle
+
+    def remove(self, handle):
+        # Swap the last entity into the freed slot
+        i = handle.index
+        last = self.count - 1
+        if i != last:
+            for arr in self._arrays():
+                arr[i] = arr[last]
+            moved = self.handles[last]
+            moved.index = i
+            self.handles[i] = moved
+        self.handles.pop()
+        self.count -= 1
+        self._release(handle)
+
+    def _release(self, handle):
+        handle.index = -1
+        if len(self.free) < self.pool_limit:
+            self.free.append(handle)
+
+    def remove_many(self, handles):
+        if self.stable:
+            keep = np.ones(self.count, dtype=bool)
+            for handle in handles:
+                if handle.index >= 0:
+                    keep[handle.index] = False
+            self._compact(keep)
+            return
+        # Highest slots first, so every swap pulls in a slot that is still alive
+        for handle in sorted(handles, key=lambda h: h.index, reverse=True):
+            if handle.index >= 0:
+                self.remove(handle)
+
+    def _compact(self, keep):
+        n = self.count
+        removed = np.flatnonzero(~keep)
+        if not len(removed):
+            return
+        # Slots before the first removal keep their place
+        first = int(removed[0])
+        for arr in self._arrays():
+            arr[first:n - len(removed)] = arr[first:n][keep[first:]]
+        for i in removed.tolist():
+            self._release(self.handles[i])
+        handles = self.handles[:first]
+        handles.extend(h for h in self.handles[first:] if h.index >= 0)
+        for i in range(first, len(handles)):
+            handles[i].index = i
+        self.handles = handles
+        self.count = len(handles)
+
+    def remove_dead(self):
+        """Remove every entity killed since the last call."""
+        if not self.pending_dead:
+            return
+        self.pending_dead = False
+        dead = np.flatnonzero(self.flags[:self.count] & DEAD)
+        if len(dead):
+            self.remove_many([self.handles[i] for i in dead.tolist()])
+
+    def living(self):
+        """Handles not killed since the last remove_dead()."""
+        if not self.pending_dead:
+            return self.handles
+        alive = np.flatnonzero((self.flags[:self.count] & DEAD) == 0)
+        return [self.handles[i] for i in alive.tolist()]
+
+    def integrate(self):
+        """Move every entity by its velocity, keeping the previous positions."""
+        n = self.count
+        self.prev_pos[:n] = self.pos[:n]
+        self.pos[:n] += self.vel[:n]
+
+    def lerp_positions(self, alpha):
+        """Integer draw positions between the previous and current update."""
+        n = self.count
+        prev = self.prev_pos[:n]
+        return (prev + (self.pos[:n] - prev) * alpha).astype(np.int32)
+
+    def rect_positions(self):
+        return round_positions(self.pos[:self.count])
+
+    def boxes(self):
+        """Collision boxes of every slot, as [left, top, right, bottom] lists."""
+        n = self.count
+        if n > SMALL_BATCH:
+            xy = self.rect_positions()
+            return np.concatenate((xy, xy + self.size[:n]), axis=1).tolist()
+        # A few entities: one Python pass beats the NumPy calls. Same rounding as round_positions
+        boxes = []
+        for (x, y), (w, h) in zip(self.pos[:n].tolist(), self.size[:n].tolist()):
+            x = int(x + 0.5) if x >= 0 else int(x - 0.5)
+            y = int(y + 0.5) if y >= 0 else int(y - 0.5)
+            boxes.append([x, y, x + w, y + h])
+        return boxes
+
+    def colliders(self):
+        """Living handles and their collision boxes."""
+        handles = self.handles
+        boxes = self.boxes()
+        if self.pending_dead:
+            alive = [i for i, flags in enumerate(self.flags[:self.count].tolist()) if not flags & DEAD]
+            handles = [handles[i] for i in alive]
+            boxes = [boxes[i] for i in alive]
+        return handles, boxes
+
+    def pool_stats(self):
+        return {
+            'live': self.count,
+            'capacity': self.capacity,
+            'occupancy': self.count / self.capacity,
+            'free_handles': len(self.free),
+            'pool_limit': self.pool_limit,
+            'allocated': self.allocated,
+            'reused': self.reused,
+        }
+
+    def __iter__(self):
+        return iter(self.handles)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+class Bullet(Entity):
+    """Arrow handle; the image is pre-rotated to its direction of travel."""
+    __slots__ = ('image',)
+
+    @property
+    def power_level(self):
+        return int(self.store.power[self.index])
+
+class BulletStore(EntityStore):
+    EXTRA_COMPONENTS = {'power': ((), np.int8)}
+    handle_class = Bullet
+    stable = True  # Bullets collide in firing order
+    pool_limit = 512
+
+    def __init__(self, capacity=64):
+        super().__init__(BULLET, capacity)
+
+    def fire(self, x, y, dx, dy, power_level=1):
+        """Add an arrow centered on (x, y) moving along the unit vector (dx, dy)."""
+        speed = BULLET_SPEED * (1 + (power_level - 1) * 0.5)  # Arrows get faster with power
+        image = get_arrow_cache().get(power_level, dx, dy)
+        rect = image.get_rect(center=(x, y))
+        bullet = self.add(rect.x, rect.y, rect.w, rect.h, dx * speed, dy * speed)
+        bullet.image = image
+        self.power[bullet.index] = power_level
+        return bullet
+
+    def update(self, bounds):
+        """Move every bullet; returns each bullet's collision box, or None once it is outside bounds."""
+        n = self.count
+        if not n:
+            return []
+        self.integrate()
+        boxes = self.boxes()
+        left, top, right, bottom = bounds.left, bounds.top, bounds.right, bounds.bottom
+        if n > SMALL_BATCH:
+            pos = self.pos[:n]
+            x = pos[:, 0]
+            y = pos[:, 1]
+            outside = ~((x >= left) & (x <= right) & (y >= top) & (y <= bottom))
+            for i in np.flatnonzero(outside).tolist():
+                boxes[i] = None
+            return boxes
+        # A few bullets: one Python pass beats a NumPy call per step
+        for i, (x, y) in enumerate(self.pos[:n].tolist()):
+            if not (left <= x <= right and top <= y <= bottom):
+                boxes[i] = None
+        return boxes
+
+class HumanStore(EntityStore):
+    stable = True
+
+    def __init__(self, capacity=8):
+        super().__init__(HUMAN, capacity)
@@ -1,35 +1,18 @@
 import pygame
 import math
+import numpy as np
+from entities import Entity, EntityStore, PLAYER
+from simulation import SCREEN_RECT, PLAYER_SPEED
 
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, dx, dy, power_level=1):
-        super().__init__()
-        self.power_level = power_level
-        self.image = pygame.image.load(f'assets/images/arrow{power_level}.png')
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        speed = 10 * (1 + (power_level - 1) * 0.5)  # Arrows get faster with power
-        self.dx = dx * speed
-        self.dy = dy * speed
-        # Rotate the arrow image to face the direction it's moving
-        angle = math.degrees(math.atan2(-dy, dx))
-        self.image = pygame.transform.rotate(self.image, angle)
+class Player(Entity):
+    """Joystick-driven player handle; position and size live in its EntityStore."""
+    __slots__ = ('image', 'speed', 'shoot_cooldown', 'consecutive_hits', 'power_level',
+                 'last_shot_time', 'power_reset_timer')
 
-    def update(self):
-        self.rect.x += self.dx
-        self.rect.y += self.dy
-        # Remove if off screen
-        if (self.rect.right < 0 or self.rect.left > SCREEN_WIDTH or
-            self.rect.bottom < 0 or self.rect.top > SCREEN_HEIGHT):
-            self.kill()
-
-class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.image.load('assets/images/player.png')
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        self.speed = 5
+    def __init__(self, store, index):
+        super().__init__(store, index)
+        self.image = None
+        self.speed = PLAYER_SPEED
         self.shoot_cooldown = 0
         self.consecutive_hits = 0
         self.power_level = 1
@@ -40,37 +23,41 @@ class Player(pygame.sprite.Sprite):
         # Movement
         x_move = joystick.get_axis(0)
         y_move = joystick.get_axis(1)
-        
+        pos = self.pos
+        self.prev_pos[:] = pos
+
         if abs(x_move) > 0.1:
-            self.rect.x += x_move * self.speed
+            pos[0] += x_move * self.speed
         if abs(y_move) > 0.1:
-            self.rect.y += y_move * self.speed
-            
+            pos[1] += y_move * self.speed
+
         # Keep player on screen
-        self.rect.clamp_ip(pygame.display.get_surface().get_rect())
-        
+        rect = self.rect
+        rect.clamp_ip(pygame.display.get_surface().get_rect())
+        pos[:] = rect.topleft
+
         # Update power reset timer
         current_time = pygame.time.get_ticks()
         if current_time - self.last_shot_time > 2000:  # Reset power after 2 seconds of not shooting
             self.consecutive_hits = 0
             self.power_level = 1
 
-    def shoot(self, joystick):
+    def shoot(self, joystick, bullets):
         current_time = pygame.time.get_ticks()
         if current_time - self.last_shot_time < 250:  # Minimum time between shots
             return None
-            
+
         x_aim = joystick.get_axis(3)
         y_aim = joystick.get_axis(4)
-        
+
         if abs(x_aim) > 0.1 or abs(y_aim) > 0.1:
             # Normalize the direction vector
             length = math.sqrt(x_aim * x_aim + y_aim * y_aim)
             dx = x_aim / length
             dy = y_aim / length
-            
-            # Create a new bullet
-            bullet = Bullet(self.rect.centerx, self.rect.centery, dx, dy, self.power_level)
+
+            # Fire a new arrow into the shared bullet store
+            bullet = bullets.fire(*self.rect.center, dx, dy, self.power_level)
             self.last_shot_time = current_time
             return bullet
         return None
@@ -83,12 +70,44 @@ class Player(pygame.sprite.Sprite):
             self.power_level = 2
         self.last_shot_time = pygame.time.get_ticks()  # Reset the power timer
 
-def handle_bullet_collisions(bullets, enemies, player):
-    # Check for collisions between bullets and enemies
-    for bullet in bullets:
-        hits = pygame.sprite.spritecollide(bullet, enemies, True)
-        if hits:
-            player.power_up()  # Power up on successful hit
+def create_player(x, y, image=None):
+    """A Player centered on (x, y) in a store of its own."""
+    image = image or pygame.image.load('assets/images/player.png')
+    w, h = image.get_size()
+    players = EntityStore(PLAYER, capacity=1)
+    players.handle_class = Player
+    player = players.add(x - w // 2, y - h // 2, w, h)
+    player.image = image
+    return player
+
+def update_bullets(bullets):
+    # Move every bullet and remove the ones that left the screen
+    for bullet, box in zip(bullets.handles, bullets.update(SCREEN_RECT)):
+        if box is None:
             bullet.kill()
-            return len(hits)
-    return 0 
\ No newline at end of file
+    bullets.remove_dead()
+
+def handle_bullet_collisions(bullets, enemies, player):
+    # Overlap test of every bullet against every enemy in one pass over the arrays
+    nb, ne = len(bullets), len(enemies)
+    if not nb or not ne:
+        return 0
+    b_min = bullets.rect_positions()
+    b_max = b_min + bullets.size[:nb]
+    e_min = enemies.rect_positions()
+    e_max = e_min + enemies.size[:ne]
+    hits = ((b_min[:, None, 0] < e_max[None, :, 0]) & (e_min[None, :, 0] < b_max[:, None, 0]) &
+            (b_min[:, None, 1] < e_max[None, :, 1]) & (e_min[None, :, 1] < b_max[:, None, 1]))
+    hitting = np.flatnonzero(hits.any(axis=1))
+    if not len(hitting):
+        return 0
+    # The first bullet that hits anything destroys every enemy it touches
+    b = int(hitting[0])
+    killed = np.flatnonzero(hits[b]).tolist()
+    for e in killed:
+        enemies.handles[e].kill()
+    bullets.handles[b].kill()
+    player.power_up()
+    bullets.remove_dead()
+    enemies.remove_dead()
+    return len(killed)
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class Widget:
+    __slots__ = ('template', 'color', 'pos', 'value', 'surface', 'visible')
+
+    def __init__(self, template, color, pos):
+        self.template = template
+        self.color = color
+        self.pos = pos
+        self.value = None
+        self.surface = None
+        self.visible = True
+
+class Hud:
+    """Text widgets that only look up a new surface when their value changes."""
+
+    def __init__(self, font, cache=None):
+        self.font = font
+        self.cache = cache if cache is not None else TextCache()
+        self.widgets = OrderedDict()
+        self.updates = 0
+        self.reuses = 0
+
+    def add(self, name, template, color, pos):
+        self.widgets[name] = Widget(template, color, pos)
+
+    def set(self, name, value, visible=True):
+        widget = self.widgets[name]
+        widget.visible = visible
+        if visible and (widget.surface is None or value != widget.value):
+            widget.value = value
+            widget.surface = self.cache.render(self.font, widget.template.format(value), widget.color)
+            self.updates += 1
+        elif visible:
+            self.reuses += 1
+
+    def draw(self, surface, doreturn=True):
+        return surface.blits([(widget.surface, widget.pos)
+                              for widget in self.widgets.values() if widget.visible], doreturn)
+
+    def stats(self):
+        cache = self.cache
+        total = self.updates + self.reuses
+        return {
+            'updates': self.updates,
+            'reuses': self.reuses,
+            'reuse_rate': self.reuses / total if total else 0.0,
+            'cache_hits': cache.hits,
+            'cache_misses': cache.misses,
+            'cache_hit_rate': cache.hit_rate(),
+            'cached_surfaces': len(cache.surfaces),
+        }
@@ -1,125 +1,321 @@
 import pygame
 import random
 import math
+from collections import OrderedDict
+import numpy as np
 
-class Particle:
-    def __init__(self, x, y, color, velocity=None, lifetime=30, size=3, decay=0.9, glow=False):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.original_color = color
-        self.alpha = 255
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.size = size
-        self.original_size = size
-        self.decay = decay
-        self.glow = glow
-        
-        if velocity:
-            self.dx, self.dy = velocity
-        else:
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(1, 5)
-            self.dx = math.cos(angle) * speed
-            self.dy = math.sin(angle) * speed
+# Starting capacity of the particle arrays; they double when full, up to MAX_PARTICLES
+INITIAL_CAPACITY = 256
+MAX_PARTICLES = 16384
 
-    def update(self):
-        self.x += self.dx
-        self.y += self.dy
-        self.lifetime -= 1
-        self.size *= self.decay
-        
-        # Calculate alpha based on remaining lifetime
-        life_ratio = self.lifetime / self.max_lifetime
-        self.alpha = max(0, min(255, int(255 * life_ratio)))
-        
-        # Adjust color based on lifetime
-        if self.glow:
-            glow_intensity = min(255, int(255 * (1 - life_ratio)))
-            r = min(255, self.original_color[0] + glow_intensity)
-            g = min(255, self.original_color[1] + glow_intensity)
-            b = min(255, self.original_color[2] + glow_intensity)
-            self.color = (r, g, b)
-
-    def draw(self, surface):
-        if self.lifetime <= 0:
-            return False
-            
-        if self.glow:
-            # Create a glowing effect using multiple circles
-            glow_surf = pygame.Surface((int(self.size * 4), int(self.size * 4)), pygame.SRCALPHA)
-            center = (int(self.size * 2), int(self.size * 2))
-            
-            for radius in [self.size * 2, self.size * 1.5, self.size]:
-                glow_color = (*self.color, self.alpha // (4 if radius > self.size else 1))
-                pygame.draw.circle(glow_surf, glow_color, center, radius)
-            
-            surface.blit(glow_surf, (self.x - self.size * 2, self.y - self.size * 2))
+class GlowCache:
+    """LRU cache of pre-rendered particle stamps.
+
+    Stamps are keyed by quantized size, color and alpha bucket so that
+    nearby particles share a surface. Coarser steps give more hits at
+    the cost of visual fidelity; hits/misses are counted for tuning.
+    """
+
+    def __init__(self, size_step=0.5, color_step=16, alpha_buckets=16, max_bytes=4 * 1024 * 1024):
+        self.size_step = size_step
+        self.color_step = color_step
+        self.alpha_buckets = alpha_buckets
+        self.max_bytes = max_bytes
+        self.stamps = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, size, color, alpha):
+        """Vectorized key quantization for arrays of sizes, (n, 3) colors and alphas."""
+        size = np.maximum(np.round(size / self.size_step), 1).astype(np.int32)
+        # Round to the nearest step so pure 0 and 255 channels survive quantization
+        color = np.minimum((color + self.color_step // 2) // self.color_step * self.color_step, 255)
+        alpha_step = 256 // self.alpha_buckets
+        alpha = np.minimum((alpha + alpha_step // 2) // alpha_step * alpha_step, 255)
+        return size, color, alpha
+
+    def get(self, glow, size_q, color, alpha):
+        key = (glow, size_q, color, alpha)
+        stamp = self.stamps.get(key)
+        if stamp is not None:
+            self.hits += 1
+            self.stamps.move_to_end(key)
+            return stamp
+        self.misses += 1
+        stamp = self._render(glow, size_q * self.size_step, color, alpha)
+        self.stamps[key] = stamp
+        self.bytes_used += stamp.get_width() * stamp.get_height() * 4
+        while self.bytes_used > self.max_bytes and len(self.stamps) > 1:
+            _, old = self.stamps.popitem(last=False)
+            self.bytes_used -= old.get_width() * old.get_height() * 4
+            self.evictions += 1
+        return stamp
+
+    @staticmethod
+    def _render(glow, size, color, alpha):
+        if glow:
+            # Glow: three stacked circles, the outer two at quarter alpha
+            surf = pygame.Surface((int(size * 4), int(size * 4)), pygame.SRCALPHA)
+            center = (int(size * 2), int(size * 2))
+            for radius in [size * 2, size * 1.5, size]:
+                pygame.draw.circle(surf, (*color, alpha // (4 if radius > size else 1)), center, radius)
         else:
-            # Regular particle
-            particle_surf = pygame.Surface((int(self.size), int(self.size)), pygame.SRCALPHA)
-            particle_color = (*self.color, self.alpha)
-            pygame.draw.circle(particle_surf, particle_color, 
-                             (int(self.size/2), int(self.size/2)), 
-                             max(1, int(self.size/2)))
-            surface.blit(particle_surf, (self.x, self.y))
-        
-        return True
+            surf = pygame.Surface((int(size), int(size)), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (*color, alpha), (int(size / 2), int(size / 2)), max(1, int(size / 2)))
+        return surf
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'evictions': self.evictions,
+            'stamps': len(self.stamps),
+            'bytes': self.bytes_used,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
+    """Structure-of-arrays particle engine.
+
+    Every particle lives in a slot of preallocated NumPy arrays. Slots
+    [0, count) are alive; dead slots are reclaimed by moving live
+    particles from the tail into the holes, so nothing is rebuilt.
+    The arrays are the pool: they never shrink, and never grow past
+    max_particles. Emissions beyond it are dropped and counted.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY, rng=None, glow_cache=None, max_particles=MAX_PARTICLES):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.glow_cache = glow_cache if glow_cache is not None else GlowCache()
+        self.max_particles = max_particles
+        self.count = 0
+        self.dropped = 0
+        # Set by the quality governor: fraction of each burst emitted, and glow on or off
+        self.count_scale = 1.0
+        self.glow_enabled = True
+        self._allocate(min(capacity, max_particles))
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        self.max_lifetime = np.ones(capacity, dtype=np.int32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.decay = np.zeros(capacity, dtype=np.float32)
+        self.base_color = np.zeros((capacity, 3), dtype=np.int16)
+        self.color = np.zeros((capacity, 3), dtype=np.int16)
+        self.alpha = np.zeros(capacity, dtype=np.int16)
+        self.glow = np.zeros(capacity, dtype=bool)
+
+    def _arrays(self):
+        return (self.pos, self.vel, self.lifetime, self.max_lifetime, self.size,
+                self.decay, self.base_color, self.color, self.alpha, self.glow)
+
+    def _reserve(self, n):
+        # Grow the arrays (doubling) so n more particles fit, return the first free slot
+        needed = self.count + n
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            capacity = min(capacity, self.max_particles)
+            old = self._arrays()
+            self._allocate(capacity)
+            for new_arr, old_arr in zip(self._arrays(), old):
+                new_arr[:self.count] = old_arr[:self.count]
+        start = self.count
+        self.count = needed
+        return start
+
+    def emit(self, x, y, color, dx, dy, lifetime, size, decay=0.9, glow=False):
+        """Spawn len(dx) particles at (x, y); per-particle values may be arrays or scalars."""
+        n = len(dx)
+        room = self.max_particles - self.count
+        if n > room:
+            # Pool is full: keep the first particles that fit
+            self.dropped += n - room
+            if room <= 0:
+                return
+            n = room
+            dx, dy = dx[:n], dy[:n]
+            lifetime = lifetime[:n] if np.ndim(lifetime) else lifetime
+            size = size[:n] if np.ndim(size) else size
+            decay = decay[:n] if np.ndim(decay) else decay
+        s = slice(self._reserve(n), self.count)
+        self.pos[s] = (x, y)
+        self.vel[s, 0] = dx
+        self.vel[s, 1] = dy
+        self.lifetime[s] = lifetime
+        self.max_lifetime[s] = lifetime
+        self.size[s] = size
+        self.decay[s] = decay
+        self.base_color[s] = color[:3]
+        self.color[s] = color[:3]
+        self.alpha[s] = 255
+        self.glow[s] = glow
+
+    def scaled(self, count):
+        return max(1, round(count * self.count_scale))
 
     def create_explosion(self, x, y, color, particle_count=20):
-        for _ in range(particle_count):
-            particle = Particle(x, y, color, lifetime=random.randint(20, 40),
-                              size=random.uniform(2, 4), glow=True)
-            self.particles.append(particle)
+        particle_count = self.scaled(particle_count)
+        angle = self.rng.uniform(0, 2 * math.pi, particle_count)
+        speed = self.rng.uniform(1, 5, particle_count)
+        self.emit(x, y, color, np.cos(angle) * speed, np.sin(angle) * speed,
+                  lifetime=self.rng.integers(20, 41, particle_count),
+                  size=self.rng.uniform(2, 4, particle_count), glow=True)
 
     def create_power_up_effect(self, x, y, color):
         # Create a spiral effect
-        for i in range(20):
-            angle = (i / 20) * 2 * math.pi
-            speed = random.uniform(2, 4)
-            dx = math.cos(angle) * speed
-            dy = math.sin(angle) * speed
-            particle = Particle(x, y, color, velocity=(dx, dy),
-                              lifetime=40, size=3, glow=True)
-            self.particles.append(particle)
+        n = self.scaled(20)
+        angle = np.arange(n) / n * 2 * math.pi
+        speed = self.rng.uniform(2, 4, n)
+        self.emit(x, y, color, np.cos(angle) * speed, np.sin(angle) * speed,
+                  lifetime=40, size=3, glow=True)
 
     def create_trail(self, x, y, color):
         # Create a subtle trailing effect
-        particle = Particle(x, y, color, lifetime=10, size=2,
-                          velocity=(random.uniform(-0.5, 0.5), random.uniform(-0.5, 0.5)))
-        self.particles.append(particle)
+        velocity = self.rng.uniform(-0.5, 0.5, 2)
+        self.emit(x, y, color, velocity[:1], velocity[1:], lifetime=10, size=2)
 
     def update(self):
-        self.particles = [p for p in self.particles if p.lifetime > 0]
-        for particle in self.particles:
-            particle.update()
+        n = self.count
+        if n == 0:
+            return
+        self.pos[:n] += self.vel[:n]
+        self.lifetime[:n] -= 1
+        self.size[:n] *= self.decay[:n]
+
+        # Alpha fades with remaining lifetime
+        life_ratio = self.lifetime[:n] / self.max_lifetime[:n]
+        self.alpha[:n] = np.clip(255 * life_ratio, 0, 255).astype(np.int16)
+
+        # Glowing particles brighten towards white as they age
+        glow = self.glow[:n]
+        if glow.any():
+            intensity = np.minimum(255, (255 * (1 - life_ratio[glow])).astype(np.int16))
+            self.color[:n][glow] = np.minimum(255, self.base_color[:n][glow] + intensity[:, None])
+
+        self._compact()
+
+    def _compact(self):
+        # Swap-compaction: fill dead slots at the front with live slots from the tail
+        n = self.count
+        alive = self.lifetime[:n] > 0
+        live = np.flatnonzero(alive)
+        n_alive = len(live)
+        if n_alive == n:
+            return
+        holes = np.flatnonzero(~alive[:n_alive])
+        movers = live[live >= n_alive]
+        if len(holes):
+            for arr in self._arrays():
+                arr[holes] = arr[movers]
+        self.count = n_alive
 
-    def draw(self, surface):
-        for particle in self.particles:
-            particle.draw(surface)
+    def __len__(self):
+        return self.count
+
+    def pool_stats(self):
+        return {
+            'live': self.count,
+            'capacity': self.capacity,
+            'occupancy': self.count / self.max_particles,
+            'max_particles': self.max_particles,
+            'dropped': self.dropped,
+        }
+
+    def stamp_rows(self, alpha=1.0):
+        """(glow, size step, color, opacity, x, y) per live particle, as lists.
+
+        The first four make the particle's GlowCache key; x, y is where
+        its stamp goes. alpha < 1 places particles part way back along
+        their last step (render interpolation).
+        """
+        n = self.count
+        size = self.size[:n]
+        size_q, color, opacity = self.glow_cache.quantize(size, self.color[:n], self.alpha[:n])
+        glow = self.glow[:n] if self.glow_enabled else np.zeros(n, dtype=bool)
+        # Glow stamps are centred on the particle, plain ones hang from its top-left
+        offset = np.where(glow, size * 2, 0)
+        back = 1.0 - alpha
+        x = (self.pos[:n, 0] - self.vel[:n, 0] * back - offset).tolist()
+        y = (self.pos[:n, 1] - self.vel[:n, 1] * back - offset).tolist()
+        return glow.tolist(), size_q.tolist(), color.tolist(), opacity.tolist(), x, y
+
+    def draw(self, surface, alpha=1.0):
+        if self.count == 0:
+            return
+        get = self.glow_cache.get
+        surface.blits([(get(g, s, tuple(c), a), (px, py))
+                       for g, s, c, a, px, py in zip(*self.stamp_rows(alpha))],
+                      doreturn=False)
+
+    def dirty_rects(self, alpha=1.0, cell=64, pad=12):
+        """Grid-cell rects covering every live particle, padded for glow stamps."""
+        n = self.count
+        if n == 0:
+            return []
+        back = 1.0 - alpha
+        x = self.pos[:n, 0] - self.vel[:n, 0] * back
+        y = self.pos[:n, 1] - self.vel[:n, 1] * back
+        cells = np.unique(np.column_stack((x // cell, y // cell)).astype(np.int32), axis=0)
+        return [pygame.Rect(cx * cell - pad, cy * cell - pad, cell + pad * 2, cell + pad * 2)
+                for cx, cy in cells.tolist()]
 
 class ScreenShake:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
         self.shake_offset = [0, 0]
         self.shake_intensity = 0
         self.shake_decay = 0.9
+        self.enabled = True  # Turned off by the quality governor
+
+    @property
+    def active(self):
+        return self.shake_intensity > 0
 
     def start_shake(self, intensity=5):
-        self.shake_intensity = intensity
+        if self.enabled:
+            self.shake_intensity = intensity
 
     def update(self):
-        if self.shake_intensity > 0.1:
-            self.shake_offset[0] = random.uniform(-self.shake_intensity, self.shake_intensity)
-            self.shake_offset[1] = random.uniform(-self.shake_intensity, self.shake_intensity)
+        if self.enabled and self.shake_intensity > 0.1:
+            self.shake_offset[0] = self.rng.uniform(-self.shake_intensity, self.shake_intensity)
+            self.shake_offset[1] = self.rng.uniform(-self.shake_intensity, self.shake_intensity)
             self.shake_intensity *= self.shake_decay
         else:
-            self.shake_offset = [0, 0]
+            self.shake_offset[0] = 0
+            self.shake_offset[1] = 0
             self.shake_intensity = 0
 
-    def apply(self, surface):
-        return surface.copy(), self.shake_offset 
\ No newline at end of file
+    def apply(self, surface, target):
+        """Blit surface straight into target at the shake offset; nothing is copied.
+
+        Returns the integer offset used.
+        """
+        x = int(self.shake_offset[0])
+        y = int(self.shake_offset[1])
+        target.blit(surface, (x, y))
+        if x or y:
+            # Black out the strips the offset uncovers along the edges
+            width, height = target.get_size()
+            if x > 0:
+                target.fill((0, 0, 0), (0, 0, x, height))
+            elif x < 0:
+                target.fill((0, 0, 0), (width + x, 0, -x, height))
+            if y > 0:
+                target.fill((0, 0, 0), (0, 0, width, y))
+            elif y < 0:
+                target.fill((0, 0, 0), (0, height + y, width, -y))
+        return x, y
@@ -0,0 +1,186 @@
+"""Per-phase frame timing with an on-screen overlay.
+
+The game loop calls lap(name) after each phase of a frame; the time
+since the previous lap is added to that phase. end_frame() stores the
+frame's phase times in fixed-size ring buffers, so memory use stays
+flat however long the game runs. While disabled every call returns
+immediately.
+"""
+import csv
+import json
+import time
+import numpy as np
+import pygame
+
+FRAME_BUDGET_MS = 1000 / 60
+OVERLAY_REFRESH = 15  # Frames between overlay redraws
+GRAPH_SIZE = (240, 60)
+GRAPH_MAX_MS = FRAME_BUDGET_MS * 2  # Frame time at the top of the graph
+
+class FrameProfiler:
+    """Ring buffers of per-phase milliseconds for the last `capacity` frames."""
+
+    def __init__(self, capacity=600, enabled=False):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.buffers = {}  # phase -> float32 ring buffer of ms
+        self.frame_ms = np.zeros(capacity, np.float32)
+        self.current = {}
+        self.frames = 0
+        self.frame_start = self.last = time.perf_counter()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.current.clear()
+
+    def lap(self, name):
+        # Attribute the time since the last lap to `name`; repeated laps add up
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        i = self.frames % self.capacity
+        for name, ms in self.current.items():
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                buffer = self.buffers[name] = np.zeros(self.capacity, np.float32)
+            buffer[i] = ms
+        for name, buffer in self.buffers.items():
+            if name not in self.current:
+                buffer[i] = 0.0
+        self.frame_ms[i] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames += 1
+
+    def reset(self):
+        self.buffers.clear()
+        self.frame_ms[:] = 0
+        self.frames = 0
+
+    def _ordered(self, buffer):
+        # Buffer contents from oldest to newest frame
+        if self.frames < self.capacity:
+            return buffer[:self.frames]
+        return np.roll(buffer, -(self.frames % self.capacity))
+
+    def samples(self):
+        """{phase: ms per frame, oldest first}, including 'frame' for whole frames."""
+        samples = {name: self._ordered(buffer) for name, buffer in self.buffers.items()}
+        samples['frame'] = self._ordered(self.frame_ms)
+        return samples
+
+    def summary(self):
+        """{phase: {'p50', 'p95', 'p99', 'mean'}} over the buffered frames."""
+        if not self.frames:
+            return {}
+        samples = self.samples()
+        # One percentile pass over every phase at once
+        table = np.stack(list(samples.values()))
+        p50, p95, p99 = np.percentile(table, (50, 95, 99), axis=1).tolist()
+        means = table.mean(axis=1).tolist()
+        return {name: {'p50': p50[i], 'p95': p95[i], 'p99': p99[i], 'mean': means[i]}
+                for i, name in enumerate(samples)}
+
+    def export(self, path):
+        """Write the raw samples as CSV (one row per frame) or JSON, by extension."""
+        samples = self.samples()
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'frames': self.frames,
+                           'samples': {k: v.tolist() for k, v in samples.items()},
+                           'summary': self.summary()}, f, indent=2)
+            return
+        names = list(samples)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + [f'{name}_ms' for name in names])
+            first = self.frames - len(samples['frame'])
+            for row, values in enumerate(zip(*(samples[name] for name in names))):
+                writer.writerow([first + row] + [f'{v:.4f}' for v in values])
+
+class ProfilerOverlay:
+    """Frame-time graph and per-phase percentiles drawn over the game.
+
+    The overlay surface is rebuilt every OVERLAY_REFRESH frames and
+    blitted as-is in between.
+    """
+
+    def __init__(self, profiler, font, pos=(10, 210)):
+        self.profiler = profiler
+        self.font = font
+        self.pos = pos
+        self.visible = False
+        self.surface = None
+        self.built_at = -1
+        self.status = None  # Optional callable returning one more line for under the table
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.surface = None
+
+    def build(self):
+        profiler = self.profiler
+        summary = profiler.summary()
+        line_height = self.font.get_linesize()
+        # Whole frames first, then the phases in the order they ran
+        names = sorted(summary, key=lambda name: name != 'frame')
+        width = max(GRAPH_SIZE[0], 300)
+        status = self.status() if self.status else None
+        height = GRAPH_SIZE[1] + line_height * (len(names) + 1 + bool(status)) + 8
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+
+        # Frame-time graph, newest frame on the right, with the 60 FPS budget line;
+        # one bar per frame, painted as a pixel array
+        gw, gh = GRAPH_SIZE
+        frame_ms = profiler.samples()['frame'][-gw:]
+        heights = np.zeros(gw)
+        heights[gw - len(frame_ms):] = np.minimum(frame_ms / GRAPH_MAX_MS * gh, gh)
+        over = np.zeros(gw, bool)
+        over[gw - len(frame_ms):] = frame_ms > FRAME_BUDGET_MS
+        filled = np.arange(gh)[None, :] >= gh - heights[:, None]
+        pixels = np.zeros((gw, gh, 3), np.uint8)
+        pixels[filled & ~over[:, None]] = (0, 200, 0)
+        pixels[filled & over[:, None]] = (255, 60, 0)
+        pixels[:, gh - int(FRAME_BUDGET_MS / GRAPH_MAX_MS * gh)] = (255, 255, 0)
+        graph = pygame.surfarray.make_surface(pixels)
+        graph.set_colorkey((0, 0, 0))
+        surface.blit(graph, (0, 0))
+
+        # Table columns are placed by position, so any font lines up
+        y = gh + 4
+        columns = (4, 150, 210, 270)
+        rows = [(('phase', 'p50', 'p95', 'p99'), (200, 200, 200))]
+        for name in names:
+            stats = summary[name]
+            rows.append(((name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['p99']:.2f}"),
+                         (255, 255, 255)))
+        for cells, color in rows:
+            for i, (x, text) in enumerate(zip(columns, cells)):
+                cell = self.font.render(text, True, color)
+                # Numbers are right-aligned to the column edge
+                surface.blit(cell, (x if i == 0 else x - cell.get_width() + 20, y))
+            y += line_height
+        if status:
+            surface.blit(self.font.render(status, True, (200, 200, 200)), (columns[0], y))
+        self.surface = surface
+        self.built_at = profiler.frames
+
+    def current(self):
+        """The overlay surface, rebuilt if it is due; None when hidden."""
+        if not self.visible:
+            return None
+        if self.surface is None or self.profiler.frames - self.built_at >= OVERLAY_REFRESH:
+            self.build()
+        return self.surface
+
+    def draw(self, target):
+        """Blit the overlay; returns the rect it covers, or None when hidden."""
+        surface = self.current()
+        return target.blit(surface, self.pos) if surface is not None else None
@@ -0,0 +1,121 @@
+"""Adaptive effects quality, driven by measured frame time.
+
+QualityGovernor watches a rolling window of frame times. When frames
+run over budget it steps down one QUALITY_TIERS entry at a time, each
+cheaper than the last:
+
+    0 full      everything on
+    1 fewer     half the explosion and power-up particles
+    2 plain     particles drawn without glow
+    3 sparse    a quarter of the particles, trails every 150 ms
+    4 minimal   screen shake off as well
+
+When the window has been comfortably under budget for a while it steps
+back up. Tiers only touch effects, never gameplay, so recordings replay
+the same at any tier.
+"""
+from collections import deque
+import numpy as np
+from profiler import FRAME_BUDGET_MS
+
+class QualityTier:
+    __slots__ = ('name', 'particle_scale', 'glow', 'trail_interval_ms', 'shake')
+
+    def __init__(self, name, particle_scale=1.0, glow=True, trail_interval_ms=50, shake=True):
+        self.name = name
+        self.particle_scale = particle_scale  # Fraction of each burst's particles emitted
+        self.glow = glow
+        self.trail_interval_ms = trail_interval_ms
+        self.shake = shake
+
+    def apply(self, world):
+        world.particles.count_scale = self.particle_scale
+        world.particles.glow_enabled = self.glow
+        world.trail_interval_ms = self.trail_interval_ms
+        world.screen_shake.enabled = self.shake
+
+QUALITY_TIERS = [
+    QualityTier('full'),
+    QualityTier('fewer', particle_scale=0.5),
+    QualityTier('plain', particle_scale=0.5, glow=False),
+    QualityTier('sparse', particle_scale=0.25, glow=False, trail_interval_ms=150),
+    QualityTier('minimal', particle_scale=0.25, glow=False, trail_interval_ms=150, shake=False),
+]
+
+class QualityGovernor:
+    """Steps effects quality down when frames run long and back up when there is headroom.
+
+    The window's 90th percentile frame time is compared against the
+    budget each frame. Over budget steps down; under headroom * budget
+    for a full window of frames since the last change steps up. Each
+    change clears the window so the new tier is judged on its own.
+    A tier that had to be left again soon after stepping up to it is
+    held off twice as long next time, so the governor doesn't flap.
+    """
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, window=60, headroom=0.7, tiers=QUALITY_TIERS,
+                 history=100):
+        self.budget_ms = budget_ms
+        self.headroom = headroom
+        self.tiers = tiers
+        self.frame_ms = np.zeros(window, dtype=np.float64)
+        self.filled = 0
+        self.frames = 0
+        self.tier = 0
+        self.changed_at = 0
+        self.upgrade_wait = window  # Frames under headroom needed before stepping up
+        self.history = deque(maxlen=history)  # (frame, from tier, to tier, p90 ms)
+        self.world = None
+
+    @property
+    def current(self):
+        return self.tiers[self.tier]
+
+    def attach(self, world):
+        self.world = world
+        self.current.apply(world)
+
+    def set_tier(self, tier, p90=None):
+        tier = max(0, min(tier, len(self.tiers) - 1))
+        if tier == self.tier:
+            return
+        self.history.append((self.frames, self.tier, tier, p90))
+        self.tier = tier
+        self.changed_at = self.frames
+        self.filled = 0
+        if self.world is not None:
+            self.current.apply(self.world)
+
+    def update(self, frame_ms):
+        """Add one frame's time; returns the tier now in effect."""
+        window = self.frame_ms
+        window[self.frames % len(window)] = frame_ms
+        self.frames += 1
+        self.filled = min(self.filled + 1, len(window))
+        if self.filled < len(window):
+            return self.tier
+        p90 = float(np.percentile(window, 90))
+        if p90 > self.budget_ms:
+            if self.tier < len(self.tiers) - 1:
+                # Stepping straight back down after stepping up: wait longer before the next try
+                if self.history and self.history[-1][2] < self.history[-1][1] and \
+                        self.frames - self.changed_at <= 2 * len(window):
+                    self.upgrade_wait = min(self.upgrade_wait * 2, 64 * len(window))
+                self.set_tier(self.tier + 1, p90)
+        elif p90 < self.budget_ms * self.headroom and self.tier > 0 and \
+                self.frames - self.changed_at >= self.upgrade_wait:
+            self.set_tier(self.tier - 1, p90)
+        return self.tier
+
+    def describe(self):
+        return f"quality {self.tier} ({self.current.name}), {len(self.history)} changes"
+
+    def stats(self):
+        return {
+            'tier': self.tier,
+            'name': self.current.name,
+            'frames': self.frames,
+            'upgrade_wait': self.upgrade_wait,
+            'history': [{'frame': frame, 'from': old, 'to': new, 'p90_ms': p90}
+                        for frame, old, new, p90 in self.history],
+        }
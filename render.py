@@ -0,0 +1,280 @@
+import math
+import pygame
+import numpy as np
+from hud import Hud
+from simulation import (WINDOW_SIZE, TICK_RATE, INVINCIBLE_FLASH_RATE,
+                        BLACK, RED, WHITE, GREEN, YELLOW, ORANGE)
+
+def lerp(prev, pos, alpha):
+    return (prev[0] + (pos[0] - prev[0]) * alpha, prev[1] + (pos[1] - prev[1]) * alpha)
+
+def atlas_source(image):
+    """(source, area) for blitting image: its atlas and region if it is a subsurface."""
+    parent = image.get_parent()
+    if parent is None:
+        return image, None
+    return parent, pygame.Rect(image.get_offset(), image.get_size())
+
+class SpriteBatch:
+    """Collects sprites per layer, culls them to the viewport, and draws
+    each layer with a single Surface.blits call.
+    """
+
+    def __init__(self, viewport):
+        self.viewport = pygame.Rect(viewport)
+        self.layers = {}
+        self.draw_calls = 0
+        self.sprites = 0
+        self.culled = 0
+
+    def begin(self):
+        for layer in self.layers.values():
+            layer.clear()
+        self.draw_calls = self.sprites = self.culled = 0
+
+    def add(self, layer, source, pos, area=None):
+        w, h = area.size if area is not None else source.get_size()
+        view = self.viewport
+        x, y = pos
+        if x + w <= view.left or y + h <= view.top or x >= view.right or y >= view.bottom:
+            self.culled += 1
+            return
+        self.layers.setdefault(layer, []).append((source, (x, y), area))
+
+    def add_many(self, layer, source, positions, area=None):
+        """Add one sprite at each row of an (n, 2) position array, culled in one pass."""
+        if not len(positions):
+            return
+        w, h = area.size if area is not None else source.get_size()
+        view = self.viewport
+        x = positions[:, 0]
+        y = positions[:, 1]
+        visible = (x + w > view.left) & (y + h > view.top) & (x < view.right) & (y < view.bottom)
+        self.culled += len(positions) - int(np.count_nonzero(visible))
+        self.layers.setdefault(layer, []).extend(
+            (source, pos, area) for pos in positions[visible].tolist())
+
+    def flush(self, surface, doreturn=True):
+        rects = []
+        for layer in sorted(self.layers):
+            sprites = self.layers[layer]
+            if sprites:
+                self.sprites += len(sprites)
+                self.draw_calls += 1
+                drawn = surface.blits(sprites, doreturn)
+                if doreturn:
+                    rects.extend(drawn)
+        return rects
+
+MARKER_BIN = 40  # Off-screen enemies in horde mode are counted per this much screen edge
+
+def cell_keys(positions, cell):
+    """Flat cell number of each position on a cell-sized grid, and the number of cells."""
+    cells = positions // cell
+    cells -= cells.min(axis=0)
+    rows = int(cells[:, 1].max()) + 1
+    return cells[:, 0].astype(np.intp) * rows + cells[:, 1], (int(cells[:, 0].max()) + 1) * rows
+
+def thin_out(positions, cell):
+    """The first of the positions in each cell x cell square, in their original order."""
+    keys, n_cells = cell_keys(positions, cell)
+    # Scatter indices in reverse so each cell ends up holding its first position
+    first = np.full(n_cells, -1, dtype=np.intp)
+    first[keys[::-1]] = np.arange(len(keys) - 1, -1, -1)
+    return positions[np.sort(first[first >= 0])]
+
+# Sprite batch layers, drawn in this order
+PLAYER_LAYER = 0
+BULLET_LAYER = 1
+ENEMY_LAYER = 2
+HUMAN_LAYER = 3
+
+class Renderer:
+    """Draws a World onto a Surface; reads simulation state, never changes it.
+
+    alpha places moving entities between the previous and the current
+    tick, so motion stays smooth when frames and ticks don't line up.
+    """
+
+    def __init__(self, player_img, enemy_img, human_img, font):
+        self.player_img = player_img
+        self.enemy_img = enemy_img
+        self.human_img = human_img
+        # Sprites loaded from the asset bundle are drawn straight from its atlas
+        self.player_sprite = atlas_source(player_img)
+        self.enemy_sprite = atlas_source(enemy_img)
+        self.human_sprite = atlas_source(human_img)
+        self.batch = SpriteBatch(((0, 0), WINDOW_SIZE))
+        self.draw_calls = 0  # Blit calls issued for the last frame
+        self.font = font
+        self.hud = Hud(font)
+        self.hud.add('score', "Score: {}", WHITE, (10, 10))
+        self.hud.add('humans', "Humans Rescued: {}", GREEN, (10, 50))
+        self.hud.add('wave', "Wave: {}", YELLOW, (10, 90))
+        self.hud.add('lives', "Lives: {}", RED, (10, 130))
+        self.hud.add('streak', "Streak: x{}", ORANGE, (10, 170))
+        self.hud.add('invincible', "Invincible: {}", YELLOW, (WINDOW_SIZE[0] - 150, 10))
+        self.profiler = None  # A profiler.FrameProfiler to lap after each draw pass
+
+    def draw(self, surface, world, alpha=1.0):
+        """Redraw the whole frame. Returns None: the caller must present all of it."""
+        surface.fill(BLACK)
+        self.draw_scene(surface, world, alpha, collect=False)
+        return None
+
+    def invalidate(self):
+        """Forget what is on screen (e.g. after an overlay); a no-op for full redraws."""
+
+    def draw_scene(self, surface, world, alpha=1.0, collect=True):
+        # Draw everything over the current background; with collect, returns the rects touched
+        batch = self.batch
+        offscreen = self.batch_sprites(world, alpha)
+        rects = batch.flush(surface, collect)
+        if offscreen is not None and len(offscreen):
+            rects.extend(self.draw_horde_markers(surface, offscreen))
+        profiler = self.profiler
+        if profiler:
+            profiler.lap('sprites')
+        world.particles.draw(surface, alpha)
+        if profiler:
+            profiler.lap('particles_draw')
+        hud_rects = self.draw_hud(surface, world, collect)
+        if profiler:
+            profiler.lap('hud')
+        # One blits call each for the particles and the HUD
+        self.draw_calls = batch.draw_calls + 2
+        if collect:
+            rects.extend(world.particles.dirty_rects(alpha))
+            rects.extend(hud_rects)
+        return rects
+
+    def batch_sprites(self, world, alpha=1.0):
+        """Fill self.batch with this frame's sprites.
+
+        Returns the positions of off-screen horde enemies, or None.
+        """
+        batch = self.batch
+        batch.begin()
+        player = world.player
+        if not world.invincible or world.time_ms // INVINCIBLE_FLASH_RATE % 2:
+            source, area = self.player_sprite
+            batch.add(PLAYER_LAYER, source, lerp(player.prev_pos, player.pos, alpha), area)
+
+        for bullet in world.bullets:
+            batch.add(BULLET_LAYER, bullet.image, lerp(bullet.prev_pos, bullet.pos, alpha))
+
+        source, area = self.enemy_sprite
+        positions = world.enemies.lerp_positions(alpha)
+        lod = world.enemies.lod
+        offscreen = None
+        if lod is not None and len(positions):
+            positions, offscreen = self.split_horde(positions, lod)
+        batch.add_many(ENEMY_LAYER, source, positions, area)
+
+        source, area = self.human_sprite
+        batch.add_many(HUMAN_LAYER, source, world.humans.lerp_positions(alpha), area)
+        return offscreen
+
+    def split_horde(self, positions, lod):
+        # Visible enemies, thinned to one per cell in dense crowds, and the off-screen ones
+        w, h = self.enemy_img.get_size()
+        x = positions[:, 0]
+        y = positions[:, 1]
+        visible = (x + w > 0) & (y + h > 0) & (x < WINDOW_SIZE[0]) & (y < WINDOW_SIZE[1])
+        shown = positions[visible]
+        if len(shown) > lod.aggregate_above:
+            shown = thin_out(shown, lod.aggregate_cell)
+        return shown, positions[~visible]
+
+    def draw_horde_markers(self, surface, positions):
+        """Red ticks along the screen edge, sized by how many enemies are out past it."""
+        return [surface.fill(RED, rect) for rect in self.horde_marker_rects(positions)]
+
+    def horde_marker_rects(self, positions):
+        w, h = self.enemy_img.get_size()
+        width, height = WINDOW_SIZE
+        edge = np.column_stack((np.clip(positions[:, 0] + w // 2, 0, width - 1),
+                                np.clip(positions[:, 1] + h // 2, 0, height - 1)))
+        bins = edge // MARKER_BIN
+        rows = (height - 1) // MARKER_BIN + 1
+        counts = np.bincount(bins[:, 0] * rows + bins[:, 1])
+        occupied = np.flatnonzero(counts)
+        rects = []
+        for key, count in zip(occupied.tolist(), counts[occupied].tolist()):
+            bx, by = divmod(key, rows)
+            size = 4 + 2 * int(math.log2(count))
+            rect = pygame.Rect(0, 0, size, size)
+            rect.center = (min(bx * MARKER_BIN + MARKER_BIN // 2, width - 1),
+                           min(by * MARKER_BIN + MARKER_BIN // 2, height - 1))
+            # Pin the tick to the edge the enemies are beyond
+            if bx == 0:
+                rect.left = 0
+            elif bx == (width - 1) // MARKER_BIN:
+                rect.right = width
+            if by == 0:
+                rect.top = 0
+            elif by == (height - 1) // MARKER_BIN:
+                rect.bottom = height
+            rects.append(rect)
+        return rects
+
+    def draw_hud(self, surface, world, doreturn=True):
+        self.update_hud(world)
+        return self.hud.draw(surface, doreturn)
+
+    def update_hud(self, world):
+        hud = self.hud
+        hud.set('score', world.score)
+        hud.set('humans', world.humans_rescued)
+        hud.set('wave', world.wave)
+        hud.set('lives', world.player_lives)
+        hud.set('streak', world.kill_streak, visible=world.kill_streak > 1)
+        hud.set('invincible', world.invincible_timer // TICK_RATE + 1, visible=world.invincible)
+
+class DirtyRectRenderer(Renderer):
+    """Renderer that only erases and redraws what moved.
+
+    Each frame it blanks the rects drawn last frame, draws the scene and
+    returns last frame's plus this frame's rects for display.update().
+    It returns None (present the whole frame) while the screen shakes,
+    on the frame after shaking stops, after invalidate(), or when the
+    dirty area would cover more than full_threshold of the screen.
+    """
+
+    def __init__(self, player_img, enemy_img, human_img, font, full_threshold=0.5):
+        super().__init__(player_img, enemy_img, human_img, font)
+        self.full_threshold = full_threshold
+        self.screen_area = WINDOW_SIZE[0] * WINDOW_SIZE[1]
+        self.screen_rect = pygame.Rect((0, 0), WINDOW_SIZE)
+        self.prev_rects = []
+        self.force_full = True
+        self.was_shaking = False
+        self.full_frames = 0
+        self.dirty_frames = 0
+
+    def invalidate(self):
+        self.force_full = True
+
+    def draw(self, surface, world, alpha=1.0):
+        shaking = world.screen_shake.active
+        full = self.force_full or shaking or self.was_shaking
+        self.force_full = False
+        self.was_shaking = shaking
+
+        if full:
+            surface.fill(BLACK)
+        else:
+            for rect in self.prev_rects:
+                surface.fill(BLACK, rect)
+
+        rects = self.draw_scene(surface, world, alpha)
+        screen_rect = self.screen_rect
+        dirty = [r.clip(screen_rect) for r in rects + self.prev_rects]
+        dirty = [r for r in dirty if r.w and r.h]
+        self.prev_rects = rects
+
+        if full or sum(r.w * r.h for r in dirty) > self.full_threshold * self.screen_area:
+            self.full_frames += 1
+            return None
+        self.dirty_frames += 1
+        return dirty
@@ -0,0 +1,188 @@
+"""Per-tick input recording and deterministic headless replay.
+
+A World is fully determined by its seed and the Inputs fed to each
+step(), so a recording is just those two things. Inputs are quantized
+to 16-bit integers (keyboard values stay exact), stored only on ticks
+where they change, with the tick numbers delta-encoded, and the
+whole stream is zlib-compressed. The header also keeps the final
+score and a state checksum, so a replay can verify it reproduced the
+original game.
+
+    python replay.py run session.rbr [--no-effects] [--profile out.json]
+    python replay.py info session.rbr
+
+Replays run uncapped with no display; a long session replays in
+seconds. benchmarks/stress.py --replay uses them as perf fixtures.
+"""
+import os
+import sys
+import argparse
+import hashlib
+import json
+import struct
+import time
+import zlib
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout pure JSON
+
+from simulation import World, Inputs, NO_INPUT, TICK_RATE
+
+RECORDING_MAGIC = b'RBTNREC\0'
+RECORDING_VERSION = 1
+HEADER = struct.Struct('<8sII')  # magic, version, metadata length
+SCALE = 32767  # Quantization of inputs in [-1, 1]
+
+# One record per input change: ticks since the previous change, then the inputs
+CHANGE = np.dtype([('dt', '<u4'), ('move_x', '<i2'), ('move_y', '<i2'),
+                   ('aim_x', '<i2'), ('aim_y', '<i2'), ('latch_aim', 'u1')])
+
+def quantize(inputs):
+    return (round(inputs.move_x * SCALE), round(inputs.move_y * SCALE),
+            round(inputs.aim_x * SCALE), round(inputs.aim_y * SCALE), int(inputs.latch_aim))
+
+def dequantize(values):
+    move_x, move_y, aim_x, aim_y, latch_aim = values
+    return Inputs(move_x / SCALE, move_y / SCALE, aim_x / SCALE, aim_y / SCALE, bool(latch_aim))
+
+def state_checksum(world):
+    """Hash of the gameplay state; equal checksums mean the replay matched."""
+    h = hashlib.sha256()
+    h.update(repr((world.tick, world.score, world.kills, world.player_lives, world.humans_rescued,
+                   [float(v) for v in world.player.pos],
+                   [(float(b.pos[0]), float(b.pos[1])) for b in world.bullets],
+                   sorted((float(h.pos[0]), float(h.pos[1])) for h in world.humans),
+                   world.game_over)).encode('utf-8'))
+    h.update(np.ascontiguousarray(world.enemies.pos[:len(world.enemies)]).tobytes())
+    return h.hexdigest()
+
+class InputRecorder:
+    """Collects the inputs of every tick of one World.
+
+    record() returns the inputs as they will replay (quantized); the
+    live game must step with those, so the replay is bit-identical.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.changes = []
+        self.last = None
+        self.last_tick = 0
+        self.ticks = 0
+        self.decoded = NO_INPUT
+
+    def record(self, tick, inputs):
+        values = quantize(inputs)
+        if values != self.last:
+            self.changes.append((tick - self.last_tick,) + values)
+            self.last = values
+            self.last_tick = tick
+            self.decoded = dequantize(values)
+        self.ticks = tick + 1
+        return self.decoded
+
+    def save(self, path, world=None):
+        metadata = {'seed': self.seed, 'ticks': self.ticks, 'tick_rate': TICK_RATE,
+                    'changes': len(self.changes)}
+        if world is not None:
+            if world.horde:
+                metadata['horde'] = True
+            metadata['score'] = world.score
+            metadata['checksum'] = state_checksum(world)
+        meta_bytes = json.dumps(metadata).encode('utf-8')
+        payload = zlib.compress(np.array(self.changes, CHANGE).tobytes(), 9)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(payload)
+
+class Recording:
+    """A loaded recording: the seed, metadata and one Inputs per tick."""
+
+    def __init__(self, metadata, changes):
+        self.metadata = metadata
+        self.seed = metadata['seed']
+        self.ticks = metadata['ticks']
+        self.changes = changes
+
+    def inputs(self):
+        """Inputs for each tick, in order; unchanged ticks share one object."""
+        current = NO_INPUT
+        ticks = np.cumsum(self.changes['dt'], dtype=np.int64)
+        fields = self.changes[['move_x', 'move_y', 'aim_x', 'aim_y', 'latch_aim']].tolist()
+        change = 0
+        for tick in range(self.ticks):
+            while change < len(fields) and ticks[change] == tick:
+                current = dequantize(fields[change])
+                change += 1
+            yield current
+
+def load_recording(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, meta_length = HEADER.unpack_from(data)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError(f"{path} is not a version {RECORDING_VERSION} recording")
+    metadata = json.loads(data[HEADER.size:HEADER.size + meta_length])
+    changes = np.frombuffer(zlib.decompress(data[HEADER.size + meta_length:]), CHANGE)
+    return Recording(metadata, changes)
+
+def replay(recording, effects=True, profiler=None):
+    """Run a recording on a fresh World as fast as possible; returns the World."""
+    world = World(seed=recording.seed, effects=effects, horde=recording.metadata.get('horde', False))
+    world.profiler = profiler
+    for inputs in recording.inputs():
+        if profiler:
+            profiler.begin_frame()
+        world.step(inputs)
+        if profiler:
+            profiler.end_frame()
+    return world
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay recorded games")
+    parser.add_argument('command', choices=('run', 'info'))
+    parser.add_argument('path')
+    parser.add_argument('--no-effects', action='store_true',
+                        help="skip particles and screen shake (gameplay is unchanged)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-phase tick times to PATH (.csv or .json)")
+    args = parser.parse_args(argv)
+
+    recording = load_recording(args.path)
+    if args.command == 'info':
+        info = dict(recording.metadata)
+        info['file_bytes'] = os.path.getsize(args.path)
+        info['minutes'] = recording.ticks / TICK_RATE / 60
+        print(json.dumps(info, indent=2))
+        return 0
+
+    profiler = None
+    if args.profile:
+        from profiler import FrameProfiler
+        profiler = FrameProfiler(capacity=max(1, recording.ticks), enabled=True)
+    start = time.perf_counter()
+    world = replay(recording, effects=not args.no_effects, profiler=profiler)
+    elapsed = time.perf_counter() - start
+    if profiler:
+        profiler.export(args.profile)
+
+    expected = recording.metadata.get('checksum')
+    matched = expected is None or expected == state_checksum(world)
+    print(json.dumps({
+        'ticks': world.tick,
+        'seconds': elapsed,
+        'ticks_per_s': world.tick / elapsed if elapsed else None,
+        'speedup': world.tick / TICK_RATE / elapsed if elapsed else None,
+        'score': world.score,
+        'matched': matched,
+    }, indent=2))
+    if not matched:
+        print("Replay diverged from the recorded game", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
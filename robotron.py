@@ -1,531 +1,450 @@
+import time
+_import_start = time.perf_counter()  # Startup timing includes the imports below
 import pygame
-import random
-import math
-import os
-from particles import ParticleSystem, ScreenShake  # Add this import
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from sprites import get_arrow_cache
+from simulation import World, Inputs, FixedTimestep, WINDOW_SIZE, BLACK, WHITE, GREEN, YELLOW
+from backends import BACKENDS, SurfaceBackend, TextureBackend, render_drivers
+from assets import load_assets
+import sfx
+from audio import AudioManager
+from profiler import FrameProfiler, ProfilerOverlay, FRAME_BUDGET_MS
+from replay import InputRecorder
+from collector import IdleCollector
+from quality import QualityGovernor, QUALITY_TIERS
 import asyncio
 
-# Initialize Pygame and its mixer
-pygame.init()
-pygame.mixer.init()
-pygame.joystick.init()  # Initialize joystick support
-
-# Constants
-WINDOW_SIZE = (800, 600)
-PLAYER_SIZE = 32
-PLAYER_SPEED = 5
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-WHITE = (255, 255, 255)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 165, 0)
-
-# Set up the display first
-screen = pygame.display.set_mode(WINDOW_SIZE)
-game_surface = pygame.Surface(WINDOW_SIZE)  # New surface for game rendering
-pygame.display.set_caption("Robotron 2084")
-
-# Initialize particle system and screen shake
-particle_system = ParticleSystem()
-screen_shake = ScreenShake()
-
-# Set up controller
-controllers = []
-for i in range(pygame.joystick.get_count()):
-    controller = pygame.joystick.Joystick(i)
-    controller.init()
-    controllers.append(controller)
-    print(f"Found controller: {controller.get_name()}")
-
 # Controller settings
 DEADZONE = 0.2  # Ignore small stick movements
 TRIGGER_THRESHOLD = 0.1  # Minimum trigger pull to register
 
-# Asset loading
-def load_image(name):
-    try:
-        path = os.path.join('assets', 'images', name)
-        print(f"Loading image from: {os.path.abspath(path)}")
-        if not os.path.exists(path):
-            print(f"File does not exist: {path}")
-            raise FileNotFoundError
-        image = pygame.image.load(path)
-        return image.convert_alpha()
-    except Exception as e:
-        print(f"Error loading image {name}: {str(e)}")
-        # Create a surface with the default color if image loading fails
-        surf = pygame.Surface((32, 32), pygame.SRCALPHA)
-        pygame.draw.rect(surf, RED if "player" in name else BLUE if "enemy" in name else GREEN, surf.get_rect())
-        return surf
-
-def load_sound(name):
-    try:
-        return pygame.mixer.Sound(os.path.join('assets', 'sounds', name))
-    except:
-        print(f"Couldn't load sound: {name}")
-        return None
-
-# Load images
-player_img = load_image('player.png')
-enemy_img = load_image('enemy.png')
-human_img = load_image('human.png')
-arrow_imgs = [load_image(f'arrow{i}.png') for i in range(1, 4)]
-
-# Load sounds
-shoot_sound = load_sound('shoot.wav')
-explosion_sound = load_sound('explosion.wav')
-rescue_sound = load_sound('rescue.wav')
-death_sound = load_sound('death.wav')
-wave_clear_sound = load_sound('wave_clear.wav')
-
-class Bullet:
-    def __init__(self, x, y, dx, dy, power_level=1):
-        self.pos = [x, y]
-        self.power_level = power_level
-        self.speed = 10 * (1 + (power_level - 1) * 0.5)  # Arrows get faster with power
-        self.dir = [dx, dy]
-        self.rect = pygame.Rect(x, y, 16, 8)  # Adjusted size for arrows
-        self.image = arrow_imgs[power_level - 1]
-        # Rotate the arrow image to face the direction it's moving
-        angle = math.degrees(math.atan2(-dy, dx))
-        self.image = pygame.transform.rotate(self.image, angle)
-        if shoot_sound:
-            shoot_sound.play()
-
-    def update(self):
-        self.pos[0] += self.dir[0] * self.speed
-        self.pos[1] += self.dir[1] * self.speed
-        self.rect.x = self.pos[0]
-        self.rect.y = self.pos[1]
-
-    def draw(self, surface):
-        surface.blit(self.image, self.pos)
-
-class Player:
-    def __init__(self, x, y):
-        self.pos = [x, y]
-        self.speed = PLAYER_SPEED
-        self.rect = pygame.Rect(x, y, PLAYER_SIZE, PLAYER_SIZE)
-        self.consecutive_hits = 0
-        self.power_level = 1
-        self.last_shot_time = 0
-        self.shoot_direction = [0, 0]  # For controller aiming
-        self.last_trail_time = 0  # For particle trail effect
-
-    def update(self, keys, controller=None):
-        current_time = pygame.time.get_ticks()
-        
-        # Create trail particles
-        if current_time - self.last_trail_time > 50:  # Control trail frequency
-            particle_system.create_trail(self.pos[0] + PLAYER_SIZE/2, 
-                                      self.pos[1] + PLAYER_SIZE/2, 
-                                      WHITE)
-            self.last_trail_time = current_time
-
-        # Update power reset timer
-        if current_time - self.last_shot_time > 2000:
-            self.consecutive_hits = 0
-            self.power_level = 1
-
-        # Movement
-        move_x = 0
-        move_y = 0
-
-        if controller:
-            # Left stick movement
-            left_x = controller.get_axis(0)
-            left_y = controller.get_axis(1)
-            if abs(left_x) > DEADZONE:
-                move_x = left_x
-            if abs(left_y) > DEADZONE:
-                move_y = left_y
-
-            # Right stick aiming
-            right_x = controller.get_axis(3)
-            right_y = controller.get_axis(4)
-            if abs(right_x) > DEADZONE or abs(right_y) > DEADZONE:
-                self.shoot_direction = [right_x, right_y]
-            
-        else:
-            # Keyboard movement
-            if keys[pygame.K_a]: move_x = -1
-            if keys[pygame.K_d]: move_x = 1
-            if keys[pygame.K_w]: move_y = -1
-            if keys[pygame.K_s]: move_y = 1
-
-            # Keyboard aiming
-            if keys[pygame.K_LEFT]: self.shoot_direction = [-1, 0]
-            elif keys[pygame.K_RIGHT]: self.shoot_direction = [1, 0]
-            elif keys[pygame.K_UP]: self.shoot_direction = [0, -1]
-            elif keys[pygame.K_DOWN]: self.shoot_direction = [0, 1]
-
-        # Apply movement
-        self.pos[0] += move_x * self.speed
-        self.pos[1] += move_y * self.speed
-
-        # Keep player on screen
-        self.pos[0] = max(0, min(self.pos[0], WINDOW_SIZE[0] - PLAYER_SIZE))
-        self.pos[1] = max(0, min(self.pos[1], WINDOW_SIZE[1] - PLAYER_SIZE))
-        self.rect.x = self.pos[0]
-        self.rect.y = self.pos[1]
-
-        # Update global player position (for compatibility)
-        global player_pos
-        player_pos[0] = self.pos[0]
-        player_pos[1] = self.pos[1]
-        player_rect.x = self.pos[0]
-        player_rect.y = self.pos[1]
-
-    def power_up(self):
-        self.consecutive_hits += 1
-        if self.consecutive_hits >= 6:
-            self.power_level = 3
-            particle_system.create_power_up_effect(self.rect.centerx, self.rect.centery, RED)
-        elif self.consecutive_hits >= 3:
-            self.power_level = 2
-            particle_system.create_power_up_effect(self.rect.centerx, self.rect.centery, YELLOW)
-        self.last_shot_time = pygame.time.get_ticks()
-
-    def try_shoot(self, controller=None):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_shot_time < 250:  # Minimum time between shots
-            return None
-
-        if controller:
-            # Right stick shooting
-            right_x = controller.get_axis(3)
-            right_y = controller.get_axis(4)
-            if abs(right_x) > DEADZONE or abs(right_y) > DEADZONE:
-                # Normalize the direction vector
-                length = math.sqrt(right_x * right_x + right_y * right_y)
-                dx = right_x / length
-                dy = right_y / length
-                bullet = Bullet(self.rect.centerx, self.rect.centery, dx, dy, self.power_level)
-                self.last_shot_time = current_time
-                return bullet
-        else:
-            # Keyboard shooting
-            if any(self.shoot_direction):
-                dx, dy = self.shoot_direction
-                length = math.sqrt(dx * dx + dy * dy)
-                dx /= length
-                dy /= length
-                bullet = Bullet(self.rect.centerx, self.rect.centery, dx, dy, self.power_level)
-                self.last_shot_time = current_time
-                return bullet
-        return None
-
-class Enemy:
-    def __init__(self, x, y):
-        self.pos = [x, y]
-        self.speed = 2
-        self.rect = pygame.Rect(x, y, 32, 32)  # Adjusted size for sprite
-
-    def update(self, target):
-        dx = target[0] - self.pos[0]
-        dy = target[1] - self.pos[1]
-        dist = max(1, (dx**2 + dy**2)**0.5)
-        self.pos[0] += self.speed * dx / dist
-        self.pos[1] += self.speed * dy / dist
-        self.rect.x = self.pos[0]
-        self.rect.y = self.pos[1]
-
-    def draw(self, surface):
-        surface.blit(enemy_img, self.pos)
-
-class Human:
-    def __init__(self, x, y):
-        self.pos = [x, y]
-        self.rect = pygame.Rect(x, y, 32, 32)  # Adjusted size for sprite
-
-    def draw(self, surface):
-        surface.blit(human_img, self.pos)
-
-# Player setup
-player = Player(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
-player_pos = [WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2]
-player_rect = pygame.Rect(player_pos[0], player_pos[1], PLAYER_SIZE, PLAYER_SIZE)
-player_lives = 3
-invincible = True
-invincible_timer = 300  # 5 seconds at 60 FPS
-INVINCIBLE_DURATION = 300
-INVINCIBLE_FLASH_RATE = 15  # How often to flash when invincible
-
-# Bullet setup
-bullets = []
-shoot_cooldown = 0
-SHOOT_DELAY = 10
-
-# Enemy setup
-wave = 1
-enemies = [Enemy(random.randint(0, WINDOW_SIZE[0]), random.randint(0, WINDOW_SIZE[1])) for _ in range(5)]
-ENEMY_SPAWN_DELAY = 180
-enemy_spawn_timer = ENEMY_SPAWN_DELAY
-
-# Human setup
-RESCUE_DISTANCE = 20
-humans = [Human(random.randint(0, WINDOW_SIZE[0]), random.randint(0, WINDOW_SIZE[1])) for _ in range(3)]
-humans_rescued = 0
-HUMAN_SPAWN_DELAY = 300  # Spawn new human every 5 seconds
-human_spawn_timer = HUMAN_SPAWN_DELAY
-
-# Score setup
-score = 0
-kill_streak = 0
-kill_streak_timer = 0
-STREAK_TIMEOUT = 120  # 2 seconds at 60 FPS
-font = pygame.font.Font(None, 36)
-big_font = pygame.font.Font(None, 74)  # Larger font for pause screen
-
-# Game state
-paused = False
-
-# Game loop
-clock = pygame.time.Clock()
-running = True
-
-def reset_player():
-    global player_pos, invincible, invincible_timer, player
-    player_pos = [WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2]
-    player_rect.x = player_pos[0]
-    player_rect.y = player_pos[1]
-    player = Player(player_pos[0], player_pos[1])
-    invincible = True
-    invincible_timer = INVINCIBLE_DURATION
-
-# Update bullet collision handling
-def handle_bullet_collision(bullet, enemy):
-    if bullet.rect.colliderect(enemy.rect):
-        enemies.remove(enemy)
-        bullets.remove(bullet)
-        if explosion_sound:
-            explosion_sound.play()
-        # Create explosion effect
-        particle_system.create_explosion(enemy.rect.centerx, enemy.rect.centery, 
-                                      (255, 100, 0))  # Orange explosion
-        screen_shake.start_shake(3)  # Small screen shake
-        return True
-    return False
-
-# Replace the game loop with an async version
-async def game_loop():
-    global running, score, wave, enemies, humans_rescued, player_lives
-
-    while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    global paused
-                    paused = not paused
-            elif event.type == pygame.JOYBUTTONDOWN:
-                if event.button == 7:  # Start button on Xbox controller
-                    paused = not paused
-
-        if not paused:
-            # Get controller if available
-            controller = controllers[0] if controllers else None
-            
-            # Handle continuous keyboard input
-            keys = pygame.key.get_pressed()
-            
-            # Update player
-            player.update(keys, controller)
-            
-            # Handle shooting
-            if shoot_cooldown > 0:
-                shoot_cooldown -= 1
-            else:
-                bullet = player.try_shoot(controller)
-                if bullet:
-                    bullets.append(bullet)
-                    shoot_cooldown = SHOOT_DELAY
-
-            # Update invincibility
-            if invincible:
-                invincible_timer -= 1
-                if invincible_timer <= 0:
-                    invincible = False
-
-            # Update and check bullets
-            for bullet in bullets[:]:
-                bullet.update()
-                if not (0 <= bullet.pos[0] <= WINDOW_SIZE[0] and 0 <= bullet.pos[1] <= WINDOW_SIZE[1]):
-                    bullets.remove(bullet)
-                    continue
-                
-                for enemy in enemies[:]:
-                    if handle_bullet_collision(bullet, enemy):
-                        player.power_up()
-                        
-                        # Update kill streak and score
-                        kill_streak += 1
-                        kill_streak_timer = STREAK_TIMEOUT
-                        
-                        # Base score + streak bonus + wave bonus + power level bonus
-                        kill_score = 100 * (1 + kill_streak * 0.1)  # 10% more for each kill in streak
-                        power_bonus = (player.power_level - 1) * 50  # 50 points extra per power level
-                        wave_bonus = wave * 10  # 10 points extra per wave
-                        score += int(kill_score + wave_bonus + power_bonus)
-                        break
-
-            # Update kill streak timer
-            if kill_streak_timer > 0:
-                kill_streak_timer -= 1
-            elif kill_streak > 0:
-                kill_streak = 0
-
-            # Update enemies
-            for enemy in enemies[:]:
-                enemy.update([player_pos[0] + PLAYER_SIZE/2, player_pos[1] + PLAYER_SIZE/2])
-                if enemy.rect.colliderect(player_rect) and not invincible:
-                    if death_sound:
-                        death_sound.play()
-                    player_lives -= 1
-                    if player_lives > 0:
-                        reset_player()
-                        # Clear nearby enemies to prevent instant death
-                        for e in enemies[:]:
-                            if (abs(e.pos[0] - player_pos[0]) < PLAYER_SIZE * 4 and 
-                                abs(e.pos[1] - player_pos[1]) < PLAYER_SIZE * 4):
-                                enemies.remove(e)
-                    else:
-                        running = False
-
-                # Check if enemy catches a human
-                for human in humans[:]:
-                    if enemy.rect.colliderect(human.rect):
-                        humans.remove(human)
-                        score -= 200
-
-            # Check for human rescue
-            for human in humans[:]:
-                if abs(player_pos[0] + PLAYER_SIZE/2 - human.pos[0]) < RESCUE_DISTANCE and \
-                   abs(player_pos[1] + PLAYER_SIZE/2 - human.pos[1]) < RESCUE_DISTANCE:
-                    humans.remove(human)
-                    humans_rescued += 1
-                    score += 500
-                    if rescue_sound:
-                        rescue_sound.play()
-
-            # Spawn new enemies
-            enemy_spawn_timer -= 1
-            if enemy_spawn_timer <= 0:
-                side = random.randint(0, 3)
-                if side == 0:  # Top
-                    x = random.randint(0, WINDOW_SIZE[0])
-                    y = -20
-                elif side == 1:  # Right
-                    x = WINDOW_SIZE[0] + 20
-                    y = random.randint(0, WINDOW_SIZE[1])
-                elif side == 2:  # Bottom
-                    x = random.randint(0, WINDOW_SIZE[0])
-                    y = WINDOW_SIZE[1] + 20
-                else:  # Left
-                    x = -20
-                    y = random.randint(0, WINDOW_SIZE[1])
-                
-                enemies.append(Enemy(x, y))
-                enemy_spawn_timer = ENEMY_SPAWN_DELAY
-
-            # Spawn new humans
-            human_spawn_timer -= 1
-            if human_spawn_timer <= 0 and len(humans) < 5:
-                humans.append(Human(
-                    random.randint(50, WINDOW_SIZE[0] - 50),
-                    random.randint(50, WINDOW_SIZE[1] - 50)
-                ))
-                human_spawn_timer = HUMAN_SPAWN_DELAY
-
-            # Update particles and screen shake
-            particle_system.update()
-            screen_shake.update()
-
-            # Clear the game surface
-            game_surface.fill(BLACK)
-            
-            # Draw game elements on game_surface instead of screen
-            if not invincible or (invincible and pygame.time.get_ticks() // INVINCIBLE_FLASH_RATE % 2):
-                game_surface.blit(player_img, player_pos)
-            
-            for bullet in bullets:
-                bullet.draw(game_surface)
-            
-            for enemy in enemies:
-                enemy.draw(game_surface)
-
-            for human in humans:
-                human.draw(game_surface)
-
-            # Draw particles
-            particle_system.draw(game_surface)
-
-            # Draw UI elements
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            humans_text = font.render(f"Humans Rescued: {humans_rescued}", True, GREEN)
-            wave_text = font.render(f"Wave: {wave}", True, YELLOW)
-            lives_text = font.render(f"Lives: {player_lives}", True, RED)
-            game_surface.blit(score_text, (10, 10))
-            game_surface.blit(humans_text, (10, 50))
-            game_surface.blit(wave_text, (10, 90))
-            game_surface.blit(lives_text, (10, 130))
-
-            if kill_streak > 1:
-                streak_text = font.render(f"Streak: x{kill_streak}", True, ORANGE)
-                game_surface.blit(streak_text, (10, 170))
-
-            if invincible:
-                inv_text = font.render(f"Invincible: {invincible_timer // 60 + 1}", True, YELLOW)
-                game_surface.blit(inv_text, (WINDOW_SIZE[0] - 150, 10))
-
-            # Apply screen shake and draw final frame
-            shaken_surface, offset = screen_shake.apply(game_surface)
-            screen.blit(shaken_surface, offset)
-
-        # Draw pause screen if paused
-        if paused:
-            # Create semi-transparent overlay
+MAX_FPS = 60  # Render rate cap; 0 renders as fast as the machine allows
+PAUSE_WAIT_MS = 100  # Longest a paused loop sleeps in event.wait before yielding to asyncio
+
+# Simulation events that have a sound, by sfx.SOUND_SPECS name
+EVENT_SOUNDS = {
+    'shoot': 'shoot',
+    'explosion': 'explosion',
+    'rescue': 'rescue',
+    'death': 'death',
+}
+
+def read_inputs(keys, controller=None):
+    # Turn live keyboard/controller state into deadzone-filtered simulation inputs
+    if controller:
+        # Left stick movement
+        left_x = controller.get_axis(0)
+        left_y = controller.get_axis(1)
+        move_x = left_x if abs(left_x) > DEADZONE else 0
+        move_y = left_y if abs(left_y) > DEADZONE else 0
+
+        # Right stick aiming; the controller only fires while the stick is held
+        right_x = controller.get_axis(3)
+        right_y = controller.get_axis(4)
+        if abs(right_x) > DEADZONE or abs(right_y) > DEADZONE:
+            return Inputs(move_x, move_y, right_x, right_y, latch_aim=False)
+        return Inputs(move_x, move_y, latch_aim=False)
+
+    # Keyboard movement
+    move_x = 0
+    move_y = 0
+    if keys[pygame.K_a]: move_x = -1
+    if keys[pygame.K_d]: move_x = 1
+    if keys[pygame.K_w]: move_y = -1
+    if keys[pygame.K_s]: move_y = 1
+
+    # Keyboard aiming; the last direction sticks
+    aim_x = 0
+    aim_y = 0
+    if keys[pygame.K_LEFT]: aim_x = -1
+    elif keys[pygame.K_RIGHT]: aim_x = 1
+    elif keys[pygame.K_UP]: aim_y = -1
+    elif keys[pygame.K_DOWN]: aim_y = 1
+    return Inputs(move_x, move_y, aim_x, aim_y)
+
+class StartupTimer:
+    """Wall-clock time of each startup phase, measured from module import."""
+
+    def __init__(self, start=None):
+        self.start = _import_start if start is None else start
+        self.phases = [('imports', (time.perf_counter() - self.start) * 1000)]
+        self.first_frame_ms = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def mark_first_frame(self):
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self.start) * 1000
+
+    def report(self):
+        return {
+            'time_to_first_frame_ms': self.first_frame_ms,
+            'phases_ms': dict(self.phases),
+        }
+
+class Game:
+    """Window, input, audio and main loop around a simulation World.
+
+    Nothing happens on construction: start() brings up only what the
+    first frame needs (display, fonts, sprites). The mixer, sounds and
+    controllers are set up by deferred tasks, one per frame, once the
+    first frame is on screen.
+    """
+
+    def __init__(self, dirty_rects=False, seed=None, profile=False, record=None, gc_idle=False, horde=False,
+                 quality=None, backend=None):
+        self.dirty_rects = dirty_rects
+        self.seed = seed
+        self.horde = horde
+        self.timer = StartupTimer()
+        # Draws frames and puts them in the window; software Surfaces unless given another
+        self.backend = backend if backend is not None else SurfaceBackend(dirty_rects)
+        self.assets = None
+        self.world = None
+        self.renderer = None
+        self.controllers = []
+        self.audio = None
+        self._font = None
+        self._big_font = None
+        self.pause_layers = None
+        # Per-phase frame timing; recording starts with --profile or the F3 overlay
+        self.profile = profile
+        self.profiler = FrameProfiler(enabled=profile)
+        self.profiler_overlay = None
+        self.record_path = record  # Where to save the input recording on exit
+        self.recorder = None
+        # GC pauses are always timed; with gc_idle, collection moves into idle frame time
+        # once startup has finished
+        self.gc_idle = gc_idle
+        self.collector = IdleCollector()
+        # Effects quality follows frame time unless a tier is pinned
+        self.governor = QualityGovernor(budget_ms=1000 / MAX_FPS if MAX_FPS else FRAME_BUDGET_MS)
+        self.pinned_quality = quality
+        self.deferred = [
+            ('audio', self.init_audio),
+            ('joysticks', self.init_joysticks),
+        ]
+        self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
+        self.paused = False
+        self.running = True
+
+    @property
+    def font(self):
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.Font(None, 36)
+        return self._font
+
+    @property
+    def big_font(self):
+        # Larger font for pause screen, created on first pause
+        if self._big_font is None:
+            self._big_font = pygame.font.Font(None, 74)
+        return self._big_font
+
+    def start(self):
+        timer = self.timer
+        with timer.phase('display'):
+            pygame.display.init()
+            self.backend.open("Robotron 2084")
+        with timer.phase('images'):
+            # Load assets from the packed bundle, falling back to the individual files
+            self.assets = assets = load_assets()
+            player_img = assets.image('player.png')
+            enemy_img = assets.image('enemy.png')
+            human_img = assets.image('human.png')
+            arrow_imgs = [assets.image(f'arrow{i}.png') for i in range(1, 4)]
+            # Arrow rotations are built as shots need them instead of all up front
+            get_arrow_cache(arrow_imgs, lazy=True)
+        with timer.phase('fonts'):
+            font = self.font
+        with timer.phase('world'):
+            self.world = World(seed=self.seed, horde=self.horde)
+            self.renderer = self.backend.load(player_img, enemy_img, human_img, font)
+            self.attach_profiler()
+            self.governor.attach(self.world)
+            if self.pinned_quality is not None:
+                self.governor.set_tier(self.pinned_quality)
+            if self.record_path:
+                self.recorder = InputRecorder(self.world.seed)
+
+    def attach_profiler(self):
+        # The world and renderer only lap their phases while the profiler records
+        profiler = self.profiler if self.profiler.enabled else None
+        self.world.profiler = profiler
+        self.renderer.profiler = profiler
+
+    def toggle_profiler_overlay(self):
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self.profiler, pygame.font.SysFont('monospace', 14))
+            self.profiler_overlay.status = self.governor.describe
+        self.profiler_overlay.toggle()
+        self.profiler.enabled = self.profile or self.profiler_overlay.visible
+        self.attach_profiler()
+        # Uncover the area under the overlay when it is hidden
+        self.backend.invalidate()
+
+    def init_audio(self):
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Couldn't start audio: {e}")
+            return
+        # Synthesize at the mixer's own format (cached on disk); sounds without
+        # a spec come from the asset bundle or WAV files
+        sounds = sfx.load_sounds()
+        for name in EVENT_SOUNDS.values():
+            if name not in sounds:
+                sounds[name] = self.assets.sound(f'{name}.wav')
+        self.audio = AudioManager(sounds)
+
+    def init_joysticks(self):
+        pygame.joystick.init()  # Initialize joystick support
+        for i in range(pygame.joystick.get_count()):
+            controller = pygame.joystick.Joystick(i)
+            controller.init()
+            self.controllers.append(controller)
+            print(f"Found controller: {controller.get_name()}")
+
+    def run_deferred(self):
+        # One deferred startup task per presented frame
+        if self.deferred:
+            name, task = self.deferred.pop(0)
+            with self.timer.phase(f'deferred:{name}'):
+                task()
+            if not self.deferred and self.gc_idle:
+                # Everything long-lived is loaded now
+                self.collector.freeze()
+                self.collector.start()
+
+    def memory_stats(self):
+        return {'gc': self.collector.stats(), 'pools': self.world.pool_stats()}
+
+    def play_sounds(self, events, now):
+        # Queue this tick's sounds; the audio manager coalesces and rate-limits them
+        if self.audio is None:
+            return
+        for event in events:
+            name = EVENT_SOUNDS.get(event)
+            if name:
+                self.audio.play(name)
+        self.audio.flush(now)
+
+    def get_pause_layers(self):
+        # Semi-transparent overlay and pause text, rendered on the first pause only
+        if self.pause_layers is None:
             overlay = pygame.Surface(WINDOW_SIZE)
             overlay.fill(BLACK)
             overlay.set_alpha(128)
-            screen.blit(overlay, (0, 0))
-            
-            # Draw pause text
-            pause_text = big_font.render("PAUSED", True, YELLOW)
-            continue_text = font.render("Press SPACE to continue", True, WHITE)
-            
+            pause_text = self.big_font.render("PAUSED", True, YELLOW)
+            continue_text = self.font.render("Press SPACE to continue", True, WHITE)
             pause_rect = pause_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2 - 20))
             continue_rect = continue_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2 + 20))
-            
-            screen.blit(pause_text, pause_rect)
-            screen.blit(continue_text, continue_rect)
-        
-        pygame.display.flip()
-        clock.tick(60)
-        
-        # This is required for web compatibility
-        await asyncio.sleep(0)
-
-    # Game Over screen
-    screen.fill(BLACK)
-    game_over_text = font.render(f"Game Over! Final Score: {score}", True, WHITE)
-    rescued_text = font.render(f"Humans Rescued: {humans_rescued}", True, GREEN)
-    text_rect = game_over_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2))
-    rescued_rect = rescued_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2 + 40))
-    screen.blit(game_over_text, text_rect)
-    screen.blit(rescued_text, rescued_rect)
-    pygame.display.flip()
-    
-    # Wait a few seconds before quitting
-    await asyncio.sleep(3)
-
-# Replace the main game loop with this
-if __name__ == '__main__':
-    asyncio.run(game_loop())
+            self.pause_layers = [(overlay, (0, 0)), (pause_text, pause_rect), (continue_text, continue_rect)]
+        return self.pause_layers
+
+    def draw_pause_screen(self):
+        # Composite the last game frame and the pause layers once per pause
+        self.backend.show(self.get_pause_layers())
+
+    async def game_loop(self, max_frames=None):
+        backend = self.backend
+        world = self.world
+        timestep = self.timestep
+        profiler = self.profiler
+
+        last_time = time.perf_counter()
+        pause_drawn = False
+        frame_budget_ms = 1000 / MAX_FPS if MAX_FPS else 0
+        frames = 0
+        while self.running:
+            frame_start = time.perf_counter()
+            profiler.begin_frame()
+            if self.paused:
+                # Block until input arrives instead of spinning; the timeout keeps
+                # yielding to asyncio for web builds
+                events = [pygame.event.wait(PAUSE_WAIT_MS)] + pygame.event.get()
+            else:
+                events = pygame.event.get()
+
+            # Handle events
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        self.paused = not self.paused
+                    elif event.key == pygame.K_F3:
+                        self.toggle_profiler_overlay()
+                elif event.type == pygame.JOYBUTTONDOWN:
+                    if event.button == 7:  # Start button on Xbox controller
+                        self.paused = not self.paused
+                elif event.type == pygame.WINDOWEXPOSED:
+                    pause_drawn = False
+
+            if self.paused:
+                if not pause_drawn:
+                    self.draw_pause_screen()
+                    pause_drawn = True
+                self.collector.idle(PAUSE_WAIT_MS)  # Paused frames are all idle time
+                await asyncio.sleep(0)
+                continue
+
+            if pause_drawn:
+                # Resuming: the pause doesn't count as simulation time, and the
+                # overlay has to be painted over
+                pause_drawn = False
+                last_time = time.perf_counter()
+                backend.invalidate()
+
+            now = time.perf_counter()
+            elapsed = now - last_time
+            last_time = now
+
+            profiler.lap('events')
 
-# Quit Pygame
-pygame.quit()
\ No newline at end of file
+            # Get controller if available
+            controller = self.controllers[0] if self.controllers else None
+            inputs = read_inputs(pygame.key.get_pressed(), controller)
+            profiler.lap('inputs')
+
+            # Run as many fixed ticks as real time calls for; under load this
+            # skips rendering for up to MAX_STEPS_PER_FRAME ticks
+            recorder = self.recorder
+            for _ in range(timestep.advance(elapsed)):
+                # Recorded games step with the inputs exactly as they will replay
+                world.step(recorder.record(world.tick, inputs) if recorder else inputs)
+                self.play_sounds(world.events, world.time_ms)
+                profiler.lap('audio')
+                if world.game_over:
+                    self.running = False
+                    break
+
+            backend.present(world, timestep.alpha, self.profiler_overlay, profiler)
+            self.timer.mark_first_frame()
+            self.run_deferred()
+            profiler.lap('deferred')
+
+            frames += 1
+            if max_frames is not None and frames >= max_frames:
+                profiler.end_frame()
+                return
+            # Frame times cover the work, not the wait for the next frame
+            profiler.end_frame()
+            work_ms = (time.perf_counter() - frame_start) * 1000
+            if self.pinned_quality is None:
+                self.governor.update(work_ms)
+            self.collector.idle(frame_budget_ms - work_ms)
+            self.clock.tick(MAX_FPS)
+
+            # This is required for web compatibility
+            await asyncio.sleep(0)
+
+        # Game Over screen
+        font = self.font
+        game_over_text = font.render(f"Game Over! Final Score: {world.score}", True, WHITE)
+        rescued_text = font.render(f"Humans Rescued: {world.humans_rescued}", True, GREEN)
+        text_rect = game_over_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2))
+        rescued_rect = rescued_text.get_rect(center=(WINDOW_SIZE[0]/2, WINDOW_SIZE[1]/2 + 40))
+        backend.show([(game_over_text, text_rect), (rescued_text, rescued_rect)], keep_frame=False)
+
+        # Wait a few seconds before quitting
+        await asyncio.sleep(3)
+
+def window_size(text):
+    # argparse type for WxH
+    try:
+        width, height = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, e.g. 1600x1200, not {text!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"window size must be positive, not {text!r}")
+    return width, height
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Robotron 2084 - Link Edition")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="only redraw changed screen regions (low-power machines)")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='surface',
+                        help="surface: software drawing (default); texture: SDL2 Renderer with "
+                             "textures uploaded once, scaled to any window size")
+    parser.add_argument('--window-size', type=window_size, metavar='WxH',
+                        help="with --backend texture, the initial window size (default %dx%d)" % WINDOW_SIZE)
+    parser.add_argument('--render-driver', metavar='NAME',
+                        help="with --backend texture, the SDL render driver, e.g. opengl or software "
+                             "(--render-driver list shows them)")
+    parser.add_argument('--seed', type=int, help="seed for a reproducible game")
+    parser.add_argument('--horde', action='store_true',
+                        help="level of detail for far-off enemies, so waves can grow to thousands")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record the seed and every tick's inputs to PATH for replay.py")
+    parser.add_argument('--profile', action='store_true',
+                        help="record per-phase frame times from the start (F3 shows the overlay)")
+    parser.add_argument('--profile-export', metavar='PATH',
+                        help="with --profile, write the recorded frame times to PATH (.csv or .json) on exit")
+    parser.add_argument('--gc-idle', action='store_true',
+                        help="freeze startup objects and run garbage collection only in idle frame time")
+    parser.add_argument('--gc-stats', action='store_true',
+                        help="print GC pause times and pool occupancy as JSON on exit")
+    parser.add_argument('--quality', type=int, choices=range(len(QUALITY_TIERS)), metavar='TIER',
+                        help="pin effects quality to TIER (0 full to %d minimal) instead of adapting "
+                             "to frame time" % (len(QUALITY_TIERS) - 1))
+    parser.add_argument('--quality-stats', action='store_true',
+                        help="print the quality tier and its changes as JSON on exit")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print startup phase timings as JSON once startup finishes, then exit")
+    parser.add_argument('--startup-budget', type=float, metavar='MS',
+                        help="with --startup-report, exit 1 if time to first frame exceeds MS")
+    args = parser.parse_args(argv)
+    if args.render_driver == 'list':
+        print('\n'.join(render_drivers()))
+        return 0
+    backend = None  # Game's default, software Surfaces
+    if args.backend == 'texture':
+        if args.dirty_rects:
+            parser.error("--dirty-rects only applies to --backend surface")
+        backend = TextureBackend(window_size=args.window_size, driver=args.render_driver)
+    elif args.window_size or args.render_driver:
+        parser.error("--window-size and --render-driver need --backend texture")
+
+    game = Game(dirty_rects=args.dirty_rects, seed=args.seed,
+                profile=args.profile or bool(args.profile_export), record=args.record,
+                gc_idle=args.gc_idle, horde=args.horde, quality=args.quality, backend=backend)
+    game.start()
+    if args.startup_report:
+        # Run frames until every deferred startup task has run
+        asyncio.run(game.game_loop(max_frames=len(game.deferred) + 1))
+        report = game.timer.report()
+        print(json.dumps(report, indent=2))
+        pygame.quit()
+        if args.startup_budget is not None and report['time_to_first_frame_ms'] > args.startup_budget:
+            print(f"Time to first frame {report['time_to_first_frame_ms']:.1f} ms "
+                  f"exceeds budget of {args.startup_budget:.1f} ms", file=sys.stderr)
+            return 1
+        return 0
+
+    asyncio.run(game.game_loop())
+    if game.recorder:
+        game.recorder.save(args.record, game.world)
+    if args.profile_export:
+        game.profiler.export(args.profile_export)
+    if args.gc_stats:
+        print(json.dumps(game.memory_stats(), indent=2))
+    if args.quality_stats:
+        print(json.dumps(game.governor.stats(), indent=2))
+    # Quit Pygame
+    pygame.quit()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
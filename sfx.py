@@ -0,0 +1,141 @@
+"""Declarative sound-effect synthesis.
+
+A sound is a dict spec: a duration, a volume, a decay envelope and a
+list of layers. Each layer is an oscillator (sine, square, saw) or
+noise with an amplitude, and oscillators can sweep their frequency over
+the sound's duration:
+
+    {'duration': 0.2, 'volume': 0.3, 'decay': 4,
+     'layers': [{'wave': 'sine', 'freq': 440, 'sweep': 1.0}]}
+
+sweep s multiplies the phase by (1 + s * t / duration), so 1.0 rises
+and -0.5 falls. decay k applies exp(-k * t / duration); 0 holds.
+
+Sounds are rendered at the mixer's actual sample rate, sample format
+and channel count. The PCM is cached on disk under a hash of the spec
+and that format, so an unchanged sound is never synthesized twice.
+"""
+import pygame
+import hashlib
+import json
+import os
+import numpy as np
+
+CACHE_DIR = os.path.join('.cache', 'sfx')
+ENGINE_VERSION = 1  # Bump when rendering changes, to invalidate cached PCM
+
+# The game's sound effects
+SOUND_SPECS = {
+    # High-pitched short beep
+    'shoot': {'duration': 0.1, 'volume': 0.3, 'decay': 4,
+              'layers': [{'wave': 'sine', 'freq': 880}]},
+    # Low frequency with decay
+    'explosion': {'duration': 0.3, 'volume': 0.4, 'decay': 4,
+                  'layers': [{'wave': 'sine', 'freq': 150}]},
+    # Ascending tone
+    'rescue': {'duration': 0.2, 'volume': 0.3, 'decay': 0,
+               'layers': [{'wave': 'sine', 'freq': 440, 'sweep': 1.0}]},
+    # Descending tone with decay
+    'death': {'duration': 0.5, 'volume': 0.4, 'decay': 5,
+              'layers': [{'wave': 'sine', 'freq': 440, 'sweep': -0.5}]},
+    # Triumphant major chord
+    'wave_clear': {'duration': 0.6, 'volume': 0.4, 'decay': 2,
+                   'layers': [{'wave': 'sine', 'freq': 440, 'amp': 0.3},
+                              {'wave': 'sine', 'freq': 554, 'amp': 0.2},
+                              {'wave': 'sine', 'freq': 659, 'amp': 0.2}]},
+}
+
+def mixer_format():
+    """(sample_rate, size, channels) of the running mixer, or the game's defaults."""
+    return pygame.mixer.get_init() or (44100, -16, 2)
+
+def synthesize(spec, sample_rate):
+    """Render a spec to mono float64 samples in [-1, 1]."""
+    duration = spec['duration']
+    t = np.linspace(0, duration, int(sample_rate * duration))
+    signal = np.zeros_like(t)
+    rng = None
+    for layer in spec['layers']:
+        amp = layer.get('amp', 1.0)
+        wave = layer['wave']
+        if wave == 'noise':
+            if rng is None:
+                rng = np.random.default_rng(spec.get('seed', 0))
+            signal += rng.uniform(-1, 1, len(t)) * amp
+            continue
+        phase = layer['freq'] * t * (1 + layer.get('sweep', 0.0) * t / duration)
+        if wave == 'sine':
+            signal += np.sin(2 * np.pi * phase) * amp
+        elif wave == 'square':
+            signal += np.sign(np.sin(2 * np.pi * phase)) * amp
+        elif wave == 'saw':
+            signal += (2 * (phase % 1.0) - 1) * amp
+        else:
+            raise ValueError(f"Unknown wave type: {wave}")
+    decay = spec.get('decay', 0)
+    if decay:
+        signal *= np.exp(-decay * t / duration)
+    return signal * spec.get('volume', 1.0)
+
+def to_pcm(signal, size, channels):
+    """Convert float samples to interleaved PCM bytes in a pygame mixer format."""
+    if size == -16:
+        samples = (signal * 32767).astype(np.int16)
+    elif size == 16:
+        samples = (signal * 32767 + 32768).astype(np.uint16)
+    elif size == -8:
+        samples = (signal * 127).astype(np.int8)
+    elif size == 8:
+        samples = (signal * 127 + 128).astype(np.uint8)
+    elif size == 32:
+        samples = signal.astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported mixer sample size: {size}")
+    return np.repeat(samples[:, None], channels, axis=1).tobytes()
+
+def spec_hash(spec, fmt):
+    key = json.dumps({'spec': spec, 'format': list(fmt), 'engine': ENGINE_VERSION}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+class SoundSynth:
+    """Renders specs to PCM for one mixer format, through the on-disk cache."""
+
+    def __init__(self, fmt=None, cache_dir=CACHE_DIR):
+        self.format = tuple(fmt) if fmt is not None else mixer_format()
+        self.cache_dir = cache_dir
+        self.rendered = 0
+        self.cache_hits = 0
+
+    def pcm(self, spec):
+        path = None
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, spec_hash(spec, self.format) + '.pcm')
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self.cache_hits += 1
+                return data
+            except OSError:
+                pass
+        sample_rate, size, channels = self.format
+        data = to_pcm(synthesize(spec, sample_rate), size, channels)
+        self.rendered += 1
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(path + '.tmp', path)
+            except OSError as e:
+                print(f"Couldn't cache sound: {e}")
+        return data
+
+    def render_batch(self, specs):
+        """Render {name: spec} to {name: pcm bytes}."""
+        return {name: self.pcm(spec) for name, spec in specs.items()}
+
+def load_sounds(specs=SOUND_SPECS, cache_dir=CACHE_DIR):
+    """Render specs into pygame Sounds for the running mixer."""
+    synth = SoundSynth(cache_dir=cache_dir)
+    return {name: pygame.mixer.Sound(buffer=data)
+            for name, data in synth.render_batch(specs).items()}
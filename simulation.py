@@ -0,0 +1,482 @@
+import pygame
+import random
+import math
+import numpy as np
+from particles import ParticleSystem, ScreenShake
+from spatial import SpatialHash
+from enemies import EnemyStore, EnemyIndex, HordeLOD, ENEMY_SPEED
+from entities import Entity, EntityStore, BulletStore, HumanStore, PLAYER
+
+# Constants
+WINDOW_SIZE = (800, 600)
+SCREEN_RECT = pygame.Rect((0, 0), WINDOW_SIZE)
+PLAYER_SIZE = 32
+HUMAN_SIZE = 32
+PLAYER_SPEED = 5
+TICK_RATE = 60  # Simulation ticks per second; every timer and speed below is per tick
+MAX_STEPS_PER_FRAME = 5  # Ticks run back to back before a late frame drops time instead
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
+
+INVINCIBLE_DURATION = 5 * TICK_RATE
+INVINCIBLE_FLASH_RATE = 15  # How often to flash when invincible (ms)
+SHOOT_DELAY = 10
+ENEMY_SPAWN_DELAY = 3 * TICK_RATE
+RESCUE_DISTANCE = 20
+HUMAN_SPAWN_DELAY = 5 * TICK_RATE  # Spawn new human every 5 seconds
+STREAK_TIMEOUT = 2 * TICK_RATE
+
+# Collision broadphase: cells twice the sprite size keep most entities in 1-4 cells
+CELL_SIZE = PLAYER_SIZE * 2
+
+class Inputs:
+    """Player intent for one tick, already filtered for deadzones.
+
+    With latch_aim (keyboard) the last aim direction sticks and keeps
+    firing; without it (controller) the player fires only while aiming.
+    """
+    __slots__ = ('move_x', 'move_y', 'aim_x', 'aim_y', 'latch_aim')
+
+    def __init__(self, move_x=0, move_y=0, aim_x=0, aim_y=0, latch_aim=True):
+        self.move_x = move_x
+        self.move_y = move_y
+        self.aim_x = aim_x
+        self.aim_y = aim_y
+        self.latch_aim = latch_aim
+
+NO_INPUT = Inputs()
+
+class Tuning:
+    """Balance parameters of one World; the module constants are the defaults."""
+    __slots__ = ('enemy_spawn_delay', 'human_spawn_delay', 'enemy_speed', 'rescue_distance',
+                 'kill_points', 'streak_bonus', 'power_bonus', 'wave_bonus',
+                 'rescue_points', 'human_lost_points')
+
+    def __init__(self, enemy_spawn_delay=ENEMY_SPAWN_DELAY, human_spawn_delay=HUMAN_SPAWN_DELAY,
+                 enemy_speed=ENEMY_SPEED, rescue_distance=RESCUE_DISTANCE,
+                 kill_points=100, streak_bonus=0.1, power_bonus=50, wave_bonus=10,
+                 rescue_points=500, human_lost_points=200):
+        self.enemy_spawn_delay = enemy_spawn_delay
+        self.human_spawn_delay = human_spawn_delay
+        self.enemy_speed = enemy_speed
+        self.rescue_distance = rescue_distance
+        self.kill_points = kill_points
+        self.streak_bonus = streak_bonus  # Fraction of kill_points added per kill in the streak
+        self.power_bonus = power_bonus  # Per power level above 1
+        self.wave_bonus = wave_bonus  # Per wave
+        self.rescue_points = rescue_points
+        self.human_lost_points = human_lost_points
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+DEFAULT_TUNING = Tuning()
+
+class Player(Entity):
+    __slots__ = ('speed', 'consecutive_hits', 'power_level', 'last_shot_time',
+                 'shoot_direction', 'last_trail_time')
+
+    def __init__(self, store, index):
+        super().__init__(store, index)
+        self.speed = PLAYER_SPEED
+        self.consecutive_hits = 0
+        self.power_level = 1
+        self.last_shot_time = 0
+        self.shoot_direction = [0, 0]
+        self.last_trail_time = 0  # For particle trail effect
+
+    def update(self, world, inputs):
+        current_time = world.time_ms
+        # Work on plain floats and write single elements back: NumPy scalar
+        # arithmetic and row assignment cost more than the move itself
+        store = self.store
+        i = self.index
+        pos = store.pos
+        x = pos.item(i, 0)
+        y = pos.item(i, 1)
+        store.prev_pos[i, 0] = x
+        store.prev_pos[i, 1] = y
+
+        # Create trail particles
+        if current_time - self.last_trail_time > world.trail_interval_ms:  # Control trail frequency
+            if world.effects:
+                world.particles.create_trail(x + PLAYER_SIZE/2,
+                                             y + PLAYER_SIZE/2,
+                                             WHITE)
+            self.last_trail_time = current_time
+
+        # Update power reset timer
+        if current_time - self.last_shot_time > 2000:
+            self.consecutive_hits = 0
+            self.power_level = 1
+
+        if inputs.aim_x or inputs.aim_y:
+            self.shoot_direction = [inputs.aim_x, inputs.aim_y]
+
+        # Apply movement
+        x += inputs.move_x * self.speed
+        y += inputs.move_y * self.speed
+
+        # Keep player on screen
+        x = max(0, min(x, WINDOW_SIZE[0] - PLAYER_SIZE))
+        y = max(0, min(y, WINDOW_SIZE[1] - PLAYER_SIZE))
+        pos[i, 0] = x
+        pos[i, 1] = y
+
+    def power_up(self, world):
+        self.consecutive_hits += 1
+        if self.consecutive_hits >= 6:
+            self.power_level = 3
+            if world.effects:
+                world.particles.create_power_up_effect(*self.rect.center, RED)
+        elif self.consecutive_hits >= 3:
+            self.power_level = 2
+            if world.effects:
+                world.particles.create_power_up_effect(*self.rect.center, YELLOW)
+        self.last_shot_time = world.time_ms
+
+    def try_shoot(self, world, inputs):
+        current_time = world.time_ms
+        if current_time - self.last_shot_time < 250:  # Minimum time between shots
+            return None
+
+        dx, dy = self.shoot_direction if inputs.latch_aim else (inputs.aim_x, inputs.aim_y)
+        if dx or dy:
+            # Normalize the direction vector
+            length = math.sqrt(dx * dx + dy * dy)
+            x, y = self.rect.center
+            bullet = world.bullets.fire(x, y, dx / length, dy / length, self.power_level)
+            self.last_shot_time = current_time
+            return bullet
+        return None
+
+class FixedTimestep:
+    """Turns real elapsed time into a whole number of fixed simulation ticks.
+
+    Leftover time carries over between frames; alpha is how far the
+    renderer sits between the last two ticks. When a frame falls more
+    than max_steps behind, the excess is dropped (and counted) so a slow
+    machine plays slower instead of spiralling.
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, max_steps=MAX_STEPS_PER_FRAME):
+        self.dt = 1 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped_ticks = 0
+
+    def advance(self, elapsed):
+        """Add elapsed seconds and return how many ticks to run now."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped_ticks += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+class World:
+    """All game state, advanced one fixed tick at a time by step().
+
+    Randomness comes only from generators seeded with `seed`, and time
+    only from the tick counter, so the same seed and inputs always
+    produce the same game. Nothing here touches the display or mixer:
+    sounds are reported as names in `events`, and with effects=False the
+    purely visual particles and screen shake are skipped as well.
+
+    horde=True turns on enemy level of detail (see enemies.HordeLOD) so
+    thousands of enemies stay cheap; it changes how far-off enemies move,
+    so horde games only replay as horde games.
+    """
+
+    def __init__(self, seed=None, effects=True, tuning=DEFAULT_TUNING, horde=False):
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.tuning = tuning
+        self.horde = horde
+        self.rng = random.Random(self.seed)
+        self.effects = effects
+        self.particles = ParticleSystem(rng=np.random.default_rng([self.seed, 1]))
+        self.screen_shake = ScreenShake(rng=random.Random(self.rng.random()))
+        self.trail_interval_ms = 50  # Lowered by the quality governor
+        self.tick = 0
+        self.events = []
+
+        self.players = EntityStore(PLAYER, capacity=1)
+        self.players.handle_class = Player
+        self.player = self.players.add(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2, PLAYER_SIZE, PLAYER_SIZE)
+        self.player_lives = 3
+        self.invincible = True
+        self.invincible_timer = INVINCIBLE_DURATION
+        self.game_over = False
+
+        self.bullets = BulletStore()
+        self.shoot_cooldown = 0
+
+        self.wave = 1
+        self.enemies = EnemyStore(rng=np.random.default_rng([self.seed, 2]), bounds=SCREEN_RECT,
+                                  lod=HordeLOD() if horde else None)
+        for _ in range(5):
+            self.enemies.add(self.rng.randint(0, WINDOW_SIZE[0]), self.rng.randint(0, WINDOW_SIZE[1]),
+                             tuning.enemy_speed)
+        self.enemy_spawn_timer = tuning.enemy_spawn_delay
+
+        self.humans = HumanStore()
+        for _ in range(3):
+            self.humans.add(self.rng.randint(0, WINDOW_SIZE[0]), self.rng.randint(0, WINDOW_SIZE[1]),
+                            HUMAN_SIZE, HUMAN_SIZE)
+        self.humans_rescued = 0
+        self.human_spawn_timer = tuning.human_spawn_delay
+
+        self.score = 0
+        self.kills = 0
+        self.kill_streak = 0
+        self.kill_streak_timer = 0
+
+        # Horde mode swaps the grid for a vectorized index over the enemy arrays
+        self.enemy_grid = EnemyIndex(self.enemies) if horde else SpatialHash(CELL_SIZE)
+        self.enemies_indexed = -1  # enemies.version the enemy grid was built at
+        self.human_grid = SpatialHash(CELL_SIZE)
+
+        # The parts of a tick, in order; profilers and benchmarks time them one by one
+        self.inputs = NO_INPUT
+        self.profiler = None  # A profiler.FrameProfiler to lap after each phase
+        self.phases = [
+            ('player', self.step_player),
+            ('bullets', self.step_bullets),
+            ('enemies', self.step_enemies),
+            ('humans', self.step_humans),
+            ('spawns', self.step_spawns),
+            ('effects', self.step_effects),
+        ]
+
+    @property
+    def time_ms(self):
+        return self.tick * 1000 // TICK_RATE
+
+    def reset_player(self):
+        self.players.remove(self.player)
+        self.player = self.players.add(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2, PLAYER_SIZE, PLAYER_SIZE)
+        self.invincible = True
+        self.invincible_timer = INVINCIBLE_DURATION
+
+    def handle_bullet_collision(self, bullet, enemy):
+        if bullet.rect.colliderect(enemy.rect) and not enemy.dead:
+            enemy.kill()
+            bullet.kill()
+            self.events.append('explosion')
+            if self.effects:
+                # Orange explosion and a small screen shake
+                self.particles.create_explosion(*enemy.rect.center, (255, 100, 0))
+                self.screen_shake.start_shake(3)
+            return True
+        return False
+
+    def index_enemies(self):
+        # Rebuilt only when enemies changed since the last build, so bullets
+        # reuse the index the enemies phase built on the previous tick
+        if self.enemies.version == self.enemies_indexed:
+            return
+        self.enemies_indexed = self.enemies.version
+        if self.horde:
+            self.enemy_grid.build()
+        else:
+            self.enemy_grid.build(*self.enemies.colliders())
+
+    def pool_stats(self):
+        """Occupancy of the entity and particle pools."""
+        return {
+            'bullets': self.bullets.pool_stats(),
+            'enemies': self.enemies.pool_stats(),
+            'particles': self.particles.pool_stats(),
+        }
+
+    def flush_removals(self):
+        # Entities killed during a tick stay in place until the end of the tick
+        self.bullets.remove_dead()
+        self.enemies.remove_dead()
+        self.humans.remove_dead()
+
+    def step(self, inputs=NO_INPUT):
+        """Advance the game by one tick."""
+        self.events.clear()
+        if self.game_over:
+            return
+        self.inputs = inputs
+        profiler = self.profiler
+        for name, phase in self.phases:
+            phase()
+            if profiler:
+                profiler.lap(name)
+        self.tick += 1
+
+    def step_player(self):
+        player = self.player
+        inputs = self.inputs
+        player.update(self, inputs)
+
+        # Handle shooting
+        if self.shoot_cooldown > 0:
+            self.shoot_cooldown -= 1
+        else:
+            # try_shoot adds the arrow to self.bullets
+            if player.try_shoot(self, inputs):
+                self.events.append('shoot')
+                self.shoot_cooldown = SHOOT_DELAY
+
+        # Update invincibility
+        if self.invincible:
+            self.invincible_timer -= 1
+            if self.invincible_timer <= 0:
+                self.invincible = False
+
+    def step_bullets(self):
+        player = self.player
+        # Update and check bullets against the enemies' positions at the start of the tick
+        self.index_enemies()
+        boxes = self.bullets.update(SCREEN_RECT)
+        for bullet, box in zip(self.bullets, boxes):
+            if box is None:
+                bullet.kill()
+                continue
+
+            for enemy in self.enemy_grid.collide_box(box):
+                if self.handle_bullet_collision(bullet, enemy):
+                    player.power_up(self)
+
+                    # Update kill streak and score
+                    self.kills += 1
+                    self.kill_streak += 1
+                    self.kill_streak_timer = STREAK_TIMEOUT
+
+                    # Base score + streak bonus + wave bonus + power level bonus
+                    tuning = self.tuning
+                    kill_score = tuning.kill_points * (1 + self.kill_streak * tuning.streak_bonus)
+                    power_bonus = (player.power_level - 1) * tuning.power_bonus
+                    wave_bonus = self.wave * tuning.wave_bonus
+                    self.score += int(kill_score + wave_bonus + power_bonus)
+                    break
+
+        # Update kill streak timer
+        if self.kill_streak_timer > 0:
+            self.kill_streak_timer -= 1
+        elif self.kill_streak > 0:
+            self.kill_streak = 0
+
+    def step_enemies(self):
+        player = self.player
+        # Update enemies, then rebuild the grid at their new positions
+        px, py = player.pos.tolist()
+        self.enemies.update((px + PLAYER_SIZE/2, py + PLAYER_SIZE/2), self.tick)
+        self.index_enemies()
+
+        if not self.invincible and self.enemy_grid.collide(player.rect):
+            self.events.append('death')
+            self.player_lives -= 1
+            if self.player_lives > 0:
+                self.reset_player()
+                player = self.player
+                # Clear nearby enemies to prevent instant death
+                reach = PLAYER_SIZE * 4
+                area = pygame.Rect(player.pos[0] - reach, player.pos[1] - reach, reach * 2, reach * 2)
+                for e in self.enemy_grid.query(area):
+                    if (abs(e.pos[0] - player.pos[0]) < reach and
+                        abs(e.pos[1] - player.pos[1]) < reach):
+                        e.kill()
+            else:
+                self.game_over = True
+
+    def step_humans(self):
+        player = self.player
+        # Check if an enemy catches a human
+        enemies_dying = self.enemies.pending_dead
+        humans, boxes = self.humans.colliders()
+        for human, box in zip(humans, boxes):
+            caught = self.enemy_grid.collide_box(box)
+            if caught and (not enemies_dying or any(not e.dead for e in caught)):
+                human.kill()
+                self.score -= self.tuning.human_lost_points
+
+        # Check for human rescue, among the humans still alive
+        if self.humans.pending_dead:
+            humans, boxes = self.humans.colliders()
+        self.human_grid.build(humans, boxes)
+        px, py = player.pos.tolist()
+        center_x = px + PLAYER_SIZE/2
+        center_y = py + PLAYER_SIZE/2
+        rescue_distance = self.tuning.rescue_distance
+        rescue_area = pygame.Rect(center_x - rescue_distance, center_y - rescue_distance,
+                                  rescue_distance * 2, rescue_distance * 2)
+        for human in self.human_grid.query(rescue_area):
+            if abs(center_x - human.pos[0]) < rescue_distance and \
+               abs(center_y - human.pos[1]) < rescue_distance:
+                human.kill()
+                self.humans_rescued += 1
+                self.score += self.tuning.rescue_points
+                self.events.append('rescue')
+
+        self.flush_removals()
+
+    def step_spawns(self):
+        # Spawn new enemies
+        self.enemy_spawn_timer -= 1
+        if self.enemy_spawn_timer <= 0:
+            rng = self.rng
+            side = rng.randint(0, 3)
+            if side == 0:  # Top
+                x = rng.randint(0, WINDOW_SIZE[0])
+                y = -20
+            elif side == 1:  # Right
+                x = WINDOW_SIZE[0] + 20
+                y = rng.randint(0, WINDOW_SIZE[1])
+            elif side == 2:  # Bottom
+                x = rng.randint(0, WINDOW_SIZE[0])
+                y = WINDOW_SIZE[1] + 20
+            else:  # Left
+                x = -20
+                y = rng.randint(0, WINDOW_SIZE[1])
+
+            self.enemies.add(x, y, self.tuning.enemy_speed)
+            self.enemy_spawn_timer = self.tuning.enemy_spawn_delay
+
+        # Spawn new humans
+        self.human_spawn_timer -= 1
+        if self.human_spawn_timer <= 0 and len(self.humans) < 5:
+            self.humans.add(self.rng.randint(50, WINDOW_SIZE[0] - 50),
+                            self.rng.randint(50, WINDOW_SIZE[1] - 50),
+                            HUMAN_SIZE, HUMAN_SIZE)
+            self.human_spawn_timer = self.tuning.human_spawn_delay
+
+    def step_effects(self):
+        # Update particles and screen shake
+        if self.effects:
+            self.particles.update()
+            self.screen_shake.update()
+
+if __name__ == '__main__':
+    # Headless throughput check: python simulation.py [ticks] [seed]
+    import os
+    import sys
+    import time
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    world = World(seed=int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    inputs = Inputs(aim_x=1)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.step(inputs)
+        if world.game_over:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"{world.tick} ticks in {elapsed:.2f}s ({world.tick / elapsed:.0f} ticks/s), score {world.score}")
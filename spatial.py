@@ -0,0 +1,82 @@
+class SpatialHash:
+    """Uniform-grid broadphase for rect-carrying entities.
+
+    Items are bucketed, with their (left, top, right, bottom) box, by
+    every cell the box overlaps. The grid is cheap to rebuild, so callers
+    rebuild it whenever positions change instead of tracking moves.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def _cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return (range(left // size, (right - 1) // size + 1),
+                range(top // size, (bottom - 1) // size + 1))
+
+    def insert(self, item, box=None):
+        if box is None:
+            rect = item.rect
+            box = (rect.left, rect.top, rect.right, rect.bottom)
+        entry = (item, box)
+        cells = self.cells
+        xs, ys = self._cell_range(*box)
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [entry]
+                else:
+                    bucket.append(entry)
+
+    def build(self, items, boxes=None):
+        """Index items by their boxes; without boxes, by each item's rect."""
+        self.cells.clear()
+        if boxes is None:
+            for item in items:
+                self.insert(item)
+        else:
+            for item, box in zip(items, boxes):
+                self.insert(item, box)
+
+    def query(self, rect):
+        """Return the items whose cells overlap rect (broadphase candidates)."""
+        cells = self.cells
+        xs, ys = self._cell_range(rect.left, rect.top, rect.right, rect.bottom)
+        found = []
+        seen = set()
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for entry in bucket:
+                        if id(entry) not in seen:
+                            seen.add(id(entry))
+                            found.append(entry[0])
+        return found
+
+    def collide(self, rect):
+        """Return the items whose box actually overlaps rect."""
+        return self.collide_box((rect.left, rect.top, rect.right, rect.bottom))
+
+    def collide_box(self, box):
+        """collide() for a (left, top, right, bottom) box."""
+        left, top, right, bottom = box
+        cells = self.cells
+        xs, ys = self._cell_range(left, top, right, bottom)
+        found = []
+        seen = set()
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for entry in bucket:
+                        l, t, r, b = entry[1]
+                        if l < right and left < r and t < bottom and top < b and id(entry) not in seen:
+                            seen.add(id(entry))
+                            found.append(entry[0])
+        return found
@@ -0,0 +1,56 @@
+import pygame
+import math
+import os
+
+# Rotations per full turn; 64 steps is under 6 degrees apart, finer than the arrow art shows
+ANGLE_STEPS = 64
+
+class RotationCache:
+    """Pre-rotated copies of a set of images, quantized to angle steps.
+
+    images is indexed by power level - 1. With lazy=True frames are
+    rotated on first use; either way the cache never holds more than
+    len(images) * steps surfaces.
+    """
+
+    def __init__(self, images, steps=ANGLE_STEPS, lazy=False):
+        self.images = list(images)
+        self.steps = steps
+        self.frames = [[None] * steps for _ in self.images]
+        if not lazy:
+            for level in range(len(self.images)):
+                for step in range(steps):
+                    self._rotate(level, step)
+
+    def _rotate(self, level, step):
+        frame = pygame.transform.rotate(self.images[level], step * 360 / self.steps)
+        self.frames[level][step] = frame
+        return frame
+
+    def step_for(self, dx, dy):
+        # Screen y points down, so flip dy to get a counter-clockwise angle
+        angle = math.atan2(-dy, dx)
+        return round(angle / (2 * math.pi) * self.steps) % self.steps
+
+    def get(self, power_level, dx, dy):
+        level = power_level - 1
+        step = self.step_for(dx, dy)
+        frame = self.frames[level][step]
+        return frame if frame is not None else self._rotate(level, step)
+
+# Shared by every bullet implementation in the process
+_arrow_cache = None
+
+def get_arrow_cache(images=None, steps=ANGLE_STEPS, lazy=False):
+    """Return the shared arrow RotationCache, building it on first call.
+
+    The first caller may pass already-loaded arrow images; otherwise
+    they are loaded from assets/images once.
+    """
+    global _arrow_cache
+    if _arrow_cache is None:
+        if images is None:
+            images = [pygame.image.load(os.path.join('assets', 'images', f'arrow{i}.png'))
+                      for i in range(1, 4)]
+        _arrow_cache = RotationCache(images, steps, lazy)
+    return _arrow_cache
@@ -0,0 +1,133 @@
+"""Draws a World through an SDL2 Renderer from Textures.
+
+The Surface renderer blits sprites, arrow rotations, glow stamps and
+HUD text in software every frame. TextureRenderer uploads each of
+those as a Texture the first time it is drawn and then only issues
+draw calls, which a GPU renderer does in video memory. SDL's software
+renderer works too, so headless machines can run it (with
+SDL_VIDEODRIVER=offscreen; the dummy driver has no renderer).
+"""
+from collections import OrderedDict
+from pygame._sdl2.video import Texture
+from render import Renderer
+from simulation import BLACK, RED
+
+MAX_TEXTURES = 1024
+
+class TextureCache:
+    """LRU cache of Textures, keyed by the Surface they came from or a stamp key."""
+
+    def __init__(self, renderer, max_entries=MAX_TEXTURES):
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self.textures = OrderedDict()
+        self.uploads = 0
+        self.evictions = 0
+
+    def get(self, surface):
+        texture = self.lookup(surface)
+        if texture is None:
+            texture = self.upload(surface, surface)
+        return texture
+
+    def lookup(self, key):
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.textures.move_to_end(key)
+        return texture
+
+    def upload(self, key, surface):
+        texture = Texture.from_surface(self.renderer, surface)
+        self.textures[key] = texture
+        self.uploads += 1
+        if len(self.textures) > self.max_entries:
+            self.textures.popitem(last=False)
+            self.evictions += 1
+        return texture
+
+    def stats(self):
+        return {'textures': len(self.textures), 'uploads': self.uploads, 'evictions': self.evictions}
+
+class TextureRenderer(Renderer):
+    """Renderer that draws into an SDL2 Renderer's back buffer instead of a Surface.
+
+    Culling, horde thinning and the HUD come from Renderer; only the
+    drawing differs. draw() leaves the frame unpresented so overlays can
+    go on top before the caller presents it.
+    """
+
+    def __init__(self, renderer, player_img, enemy_img, human_img, font):
+        super().__init__(player_img, enemy_img, human_img, font)
+        self.sdl = renderer
+        self.textures = TextureCache(renderer)
+        self.transient = None  # (surface, texture) of the last keep=False surface
+        # The sprites (or the atlas they are cut from) go up before the first frame
+        for source, _ in (self.player_sprite, self.enemy_sprite, self.human_sprite):
+            self.textures.get(source)
+
+    def clear(self):
+        self.sdl.draw_color = (*BLACK, 255)
+        self.sdl.clear()
+
+    def draw(self, world, alpha=1.0, offset=(0, 0)):
+        """Clear and draw the whole scene, shifted by offset (the screen shake)."""
+        self.clear()
+        ox, oy = offset
+        textures = self.textures
+        batch = self.batch
+        offscreen = self.batch_sprites(world, alpha)
+        draws = 0
+        for layer in sorted(batch.layers):
+            for source, (x, y), area in batch.layers[layer]:
+                if area is None:
+                    textures.get(source).draw(dstrect=(x + ox, y + oy))
+                else:
+                    textures.get(source).draw(area, (x + ox, y + oy, area.w, area.h))
+            draws += len(batch.layers[layer])
+        if offscreen is not None and len(offscreen):
+            self.sdl.draw_color = (*RED, 255)
+            for rect in self.horde_marker_rects(offscreen):
+                self.sdl.fill_rect(rect.move(ox, oy))
+        profiler = self.profiler
+        if profiler:
+            profiler.lap('sprites')
+
+        particles = world.particles
+        if particles.count:
+            lookup = textures.lookup
+            upload = textures.upload
+            stamp = particles.glow_cache.get
+            for g, s, c, a, x, y in zip(*particles.stamp_rows(alpha)):
+                key = (g, s, tuple(c), a)
+                texture = lookup(key)
+                if texture is None:
+                    texture = upload(key, stamp(*key))
+                texture.draw(dstrect=(x + ox, y + oy))
+            draws += particles.count
+        if profiler:
+            profiler.lap('particles_draw')
+
+        self.update_hud(world)
+        for widget in self.hud.widgets.values():
+            if widget.visible:
+                x, y = widget.pos
+                textures.get(widget.surface).draw(dstrect=(x + ox, y + oy))
+                draws += 1
+        if profiler:
+            profiler.lap('hud')
+        self.draw_calls = draws
+
+    def draw_surface(self, surface, pos, keep=True):
+        """Draw a Surface (pause text, an overlay) at pos, uploading it on first use.
+
+        Surfaces that are rebuilt rather than reused, like the profiler
+        overlay, pass keep=False: only the latest one's texture is held.
+        """
+        if keep:
+            texture = self.textures.get(surface)
+        elif self.transient is not None and self.transient[0] is surface:
+            texture = self.transient[1]
+        else:
+            texture = Texture.from_surface(self.sdl, surface)
+            self.transient = (surface, texture)
+        texture.draw(dstrect=pos)